@@ -0,0 +1,118 @@
+import itertools
+import math
+import numpy as np
+from .indicators import indicator_panel
+
+INITIAL_BALANCE = 10000
+LOOKBACK_WINDOW = 90
+WARMUP_BARS = 50
+
+# Default thresholds of the RSI/MACD strategy served by /api/backtest
+DEFAULT_PARAMS = {"rsi_buy": 35.0, "rsi_sell": 65.0, "macd_buy": -0.5, "macd_sell": -0.5}
+MAX_COMBINATIONS = 10000 # parameter sets per sweep; simulate holds several (combos x bars) arrays
+
+def strategy_inputs(close):
+    # RSI and MACD are causal (recursive EMAs), so one pass over the whole
+    # series gives the same value at bar i as recomputing over close[:i+1].
+    panel = indicator_panel(close)
+    return panel["rsi"], panel["macd_diff"]
+
+def grid_size(*axes):
+    return math.prod(len(axis) for axis in axes)
+
+def param_grid(rsi_buy, rsi_sell, macd_buy, macd_sell):
+    combos = np.array(list(itertools.product(rsi_buy, rsi_sell, macd_buy, macd_sell)), dtype=float).reshape(-1, 4)
+    return {name: combos[:, k] for k, name in enumerate(("rsi_buy", "rsi_sell", "macd_buy", "macd_sell"))}
+
+def simulate(close, rsi, macd_diff, params, start=WARMUP_BARS, initial_balance=INITIAL_BALANCE, record=False):
+    # Runs every parameter combination at once: signals are (combos x bars)
+    # masks, and the all-in/all-out fills advance bar by bar as array updates
+    # across combos, so per-combo cost is a few vector lanes per bar.
+    close = np.asarray(close, dtype=float)[start:]
+    rsi = np.asarray(rsi, dtype=float)[start:]
+    macd_diff = np.asarray(macd_diff, dtype=float)[start:]
+    rsi_buy, rsi_sell = params["rsi_buy"][:, None], params["rsi_sell"][:, None]
+    macd_buy, macd_sell = params["macd_buy"][:, None], params["macd_sell"][:, None]
+
+    buy = (rsi < rsi_buy) & (macd_diff > macd_buy)
+    sell = ~buy & ((rsi > rsi_sell) | (macd_diff < macd_sell))
+
+    n_combos, n_bars = buy.shape
+    balance = np.full(n_combos, float(initial_balance))
+    shares = np.zeros(n_combos)
+    last_buy = np.zeros(n_combos)
+    wins = np.zeros(n_combos, dtype=int)
+    losses = np.zeros(n_combos, dtype=int)
+    peak = np.full(n_combos, float(initial_balance))
+    drawdown = np.zeros(n_combos)
+    if record:
+        bought = np.zeros((n_combos, n_bars))
+        sold = np.zeros((n_combos, n_bars), dtype=bool)
+        profits = np.zeros((n_combos, n_bars))
+
+    for t in range(n_bars):
+        price = close[t]
+        qty = np.where(buy[:, t] & (balance > 0), balance // price, 0.0)
+        filled = qty > 0
+        balance -= qty * price
+        shares += qty
+        last_buy = np.where(filled, round(price, 2), last_buy)
+
+        closing = sell[:, t] & (shares > 0)
+        revenue = shares * price
+        profit = revenue - last_buy * shares
+        wins += closing & (profit > 0)
+        losses += closing & (profit <= 0)
+        balance = np.where(closing, balance + revenue, balance)
+        shares = np.where(closing, 0.0, shares)
+
+        equity = balance + shares * price
+        np.maximum(peak, equity, out=peak)
+        np.maximum(drawdown, (peak - equity) / peak, out=drawdown)
+
+        if record:
+            bought[:, t] = qty
+            sold[:, t] = closing
+            profits[:, t] = np.where(closing, profit, 0.0)
+
+    final_value = balance + shares * close[-1]
+    total_trades = wins + losses
+    result = {
+        "final_balance": final_value,
+        "return_percent": (final_value - initial_balance) / initial_balance * 100,
+        "total_trades": total_trades,
+        "wins": wins,
+        "max_drawdown": drawdown * 100,
+        "win_rate": np.divide(wins * 100.0, total_trades, out=np.zeros(n_combos), where=total_trades > 0),
+    }
+    if record:
+        result.update(bought=bought, sold=sold, profits=profits)
+    return result
+
+def trade_log(close, dates, result, start=WARMUP_BARS, combo=0):
+    close = np.asarray(close, dtype=float)[start:]
+    dates = list(dates)[start:]
+    trades = []
+    for t in np.flatnonzero((result["bought"][combo] > 0) | result["sold"][combo]):
+        date = dates[t].strftime("%Y-%m-%d")
+        price = round(close[t], 2)
+        if result["bought"][combo, t] > 0:
+            trades.append({"date": date, "type": "BUY", "price": price, "shares": float(result["bought"][combo, t])})
+        if result["sold"][combo, t]:
+            trades.append({"date": date, "type": "SELL", "price": price, "profit": round(float(result["profits"][combo, t]), 2)})
+    return trades
+
+def sweep(close, params, start=WARMUP_BARS, initial_balance=INITIAL_BALANCE):
+    rsi, macd_diff = strategy_inputs(close)
+    result = simulate(close, rsi, macd_diff, params, start=start, initial_balance=initial_balance)
+    rows = []
+    for k in range(len(params["rsi_buy"])):
+        rows.append({
+            **{name: float(values[k]) for name, values in params.items()},
+            "final_balance": round(float(result["final_balance"][k]), 2),
+            "return_percent": round(float(result["return_percent"][k]), 2),
+            "total_trades": int(result["total_trades"][k]),
+            "win_rate": round(float(result["win_rate"][k]), 1),
+            "max_drawdown": round(float(result["max_drawdown"][k]), 2),
+        })
+    return rows
@@ -0,0 +1,157 @@
+import json
+import os
+import threading
+import numpy as np
+import pandas as pd
+
+FIELDS = ['Open', 'High', 'Low', 'Close', 'Volume']
+PERIODS = ["1d", "5d", "1mo", "3mo", "6mo", "1y", "2y", "5y", "10y", "max"] # shortest first
+PERIOD_OFFSETS = {
+    "5d": pd.DateOffset(days=5), "1mo": pd.DateOffset(months=1), "3mo": pd.DateOffset(months=3),
+    "6mo": pd.DateOffset(months=6), "1y": pd.DateOffset(years=1), "2y": pd.DateOffset(years=2),
+    "5y": pd.DateOffset(years=5), "10y": pd.DateOffset(years=10),
+}
+
+def period_rank(period):
+    return PERIODS.index(period) if period in PERIODS else len(PERIODS) - 1
+
+def increment_period(last_ts, now=None):
+    # Shortest provider period that still reaches back to last_ts: "1d" while
+    # the last stored bar is from today, otherwise the first offset covering
+    # the gap plus a day of slack
+    now = pd.Timestamp.now(tz=last_ts.tz) if now is None else now
+    if last_ts.normalize() == now.normalize(): return "1d"
+    for period, offset in PERIOD_OFFSETS.items():
+        if now - offset < last_ts - pd.Timedelta(days=1): return period
+    return "max"
+
+def slice_period(t, last, period):
+    # First row of the trailing `period` window over sorted epoch-ns stamps
+    if period == "max" or not len(t): return 0
+    if period == "1d": cutoff = last.normalize()
+    else:
+        offset = PERIOD_OFFSETS.get(period)
+        if offset is None: return 0
+        cutoff = last - offset
+        return int(np.searchsorted(t, cutoff.value, side="right"))
+    return int(np.searchsorted(t, cutoff.value, side="left"))
+
+class BarStore:
+    # Bars on disk, one directory per symbol/interval: t.bin (int64 epoch ns)
+    # and one float64 file per OHLCV field, read back as memmaps. meta.json
+    # holds the row count and is replaced last, so a torn append is never
+    # visible; the index timezone and the longest period backfilled live
+    # there too. Single writer per root (one API process).
+    def __init__(self, root):
+        self.root = root
+        self._meta = {}   # (symbol, interval) -> meta dict
+        self._maps = {}   # (symbol, interval) -> (count, generation, {column: memmap})
+        self._locks = {}
+        self._lock = threading.Lock()
+
+    def _path(self, symbol, interval, name=""):
+        return os.path.join(self.root, symbol.upper(), interval, name)
+
+    def lock(self, symbol, interval):
+        with self._lock: return self._locks.setdefault((symbol.upper(), interval), threading.RLock())
+
+    def meta(self, symbol, interval):
+        key = (symbol.upper(), interval)
+        if key not in self._meta:
+            path = self._path(symbol, interval, "meta.json")
+            if not os.path.exists(path): return None
+            with open(path) as f: self._meta[key] = json.load(f)
+        return self._meta[key]
+
+    def covers(self, symbol, interval, period):
+        meta = self.meta(symbol, interval)
+        return bool(meta and meta["count"] and period_rank(meta["period"]) >= period_rank(period))
+
+    def last_timestamp(self, symbol, interval):
+        meta = self.meta(symbol, interval)
+        if not meta or not meta["count"]: return None
+        return pd.Timestamp(self._columns(symbol, interval)["t"][-1], tz="UTC").tz_convert(meta["tz"])
+
+    def _write_meta(self, symbol, interval, meta):
+        path = self._path(symbol, interval, "meta.json")
+        with open(path + ".tmp", "w") as f: json.dump(meta, f)
+        os.replace(path + ".tmp", path)
+        self._meta[(symbol.upper(), interval)] = meta
+
+    def _columns(self, symbol, interval):
+        key = (symbol.upper(), interval)
+        meta = self.meta(symbol, interval)
+        cached = self._maps.get(key)
+        if cached and cached[:2] == (meta["count"], meta["generation"]): return cached[2]
+        count = meta["count"]
+        columns = {"t": np.memmap(self._path(symbol, interval, "t.bin"), dtype="<i8", mode="r", shape=(count,))}
+        for field in FIELDS:
+            columns[field] = np.memmap(self._path(symbol, interval, f"{field.lower()}.bin"), dtype="<f8", mode="r", shape=(count,))
+        self._maps[key] = (count, meta["generation"], columns)
+        return columns
+
+    def read(self, symbol, interval, period="max"):
+        # Only the requested tail is copied out of the memmaps
+        with self.lock(symbol, interval):
+            meta = self.meta(symbol, interval)
+            if not meta or not meta["count"]: return pd.DataFrame(columns=FIELDS)
+            columns = self._columns(symbol, interval)
+            t = columns["t"]
+            last = pd.Timestamp(t[-1], tz="UTC").tz_convert(meta["tz"])
+            start = slice_period(t, last, period)
+            index = pd.DatetimeIndex(np.array(t[start:]).astype("datetime64[ns]"), tz="UTC").tz_convert(meta["tz"]).as_unit(meta["unit"])
+            index.name = "Datetime" if interval[-1] in "mh" else "Date"
+            data = {field: np.array(columns[field][start:]) for field in FIELDS}
+            data['Volume'] = np.nan_to_num(data['Volume']).astype(np.int64)
+            return pd.DataFrame(data, index=index)
+
+    def write(self, symbol, interval, hist, period):
+        # Replace everything stored for symbol/interval with `hist`
+        if hist is None or hist.empty: return
+        with self.lock(symbol, interval):
+            os.makedirs(self._path(symbol, interval), exist_ok=True)
+            stamps, values = _frame_arrays(hist)
+            for name, column in (("t", stamps), *((f.lower(), values[f]) for f in FIELDS)):
+                path = self._path(symbol, interval, f"{name}.bin")
+                column.tofile(path + ".tmp")
+                os.replace(path + ".tmp", path)
+            old = self.meta(symbol, interval)
+            self._write_meta(symbol, interval, {"count": len(stamps), "tz": _tz_name(hist.index), "unit": hist.index.unit, "period": period,
+                                                "generation": (old["generation"] + 1) if old else 0})
+
+    def append(self, symbol, interval, hist):
+        # Merge bars fetched since the last stored one. The last stored bar
+        # may still have been forming, so a bar with the same timestamp
+        # overwrites it. Returns False when overlapping completed bars
+        # disagree (split/dividend re-adjustment): the caller must rebuild.
+        if hist is None or hist.empty: return True
+        with self.lock(symbol, interval):
+            meta = self.meta(symbol, interval)
+            stamps, values = _frame_arrays(hist)
+            stored = self._columns(symbol, interval)
+            last = stored["t"][-1]
+            overlap = np.flatnonzero(stamps < last)
+            if len(overlap):
+                at = np.searchsorted(stored["t"], stamps[overlap])
+                found = (at < meta["count"]) & (stored["t"][np.minimum(at, meta["count"] - 1)] == stamps[overlap])
+                if not np.allclose(stored["Close"][at[found]], values['Close'][overlap[found]], rtol=1e-6, equal_nan=True): return False
+            new = stamps >= last
+            if not new.any(): return True
+            replace_last = int(stamps[new][0] == last)
+            start = meta["count"] - replace_last
+            for name, column in (("t", stamps[new]), *((f.lower(), values[f][new]) for f in FIELDS)):
+                with open(self._path(symbol, interval, f"{name}.bin"), "r+b") as f:
+                    f.truncate(meta["count"] * 8) # drop any torn tail from an interrupted append
+                    f.seek(start * 8)
+                    f.write(column.tobytes())
+            self._write_meta(symbol, interval, {**meta, "count": start + int(new.sum())})
+            return True
+
+def _tz_name(index):
+    return str(index.tz) if getattr(index, "tz", None) is not None else "UTC"
+
+def _frame_arrays(hist):
+    index = hist.index if hist.index.tz is not None else hist.index.tz_localize("UTC")
+    stamps = index.tz_convert("UTC").as_unit("ns").asi8.astype("<i8")
+    values = {field: (hist[field].to_numpy(dtype="<f8") if field in hist else np.full(len(hist), np.nan)) for field in FIELDS}
+    return stamps, values
@@ -0,0 +1,61 @@
+import hashlib
+import numpy as np
+import pandas as pd
+from .market_data import TTLCache
+from .serialization import record_columns
+
+DEGREE = 2
+PREDICTION_DAYS = 7
+COEF_TTL = 24 * 3600
+
+_coef_cache = TTLCache(maxsize=2048)
+
+def _design(n_points, x):
+    # Polynomial basis in x scaled to [0, 1] over the fitted window, which
+    # keeps the normal equations well conditioned for long histories.
+    t = np.asarray(x, dtype=float) / max(n_points - 1, 1)
+    return np.vander(t, DEGREE + 1, increasing=True)
+
+def fit(closes):
+    # Least-squares polynomial trend for each row of a (series x points)
+    # matrix. The design matrix only depends on the length, so every row
+    # is solved in a single lstsq call with one right-hand side per series.
+    closes = np.atleast_2d(np.asarray(closes, dtype=float))
+    n_points = closes.shape[1]
+    coef, *_ = np.linalg.lstsq(_design(n_points, np.arange(n_points)), closes.T, rcond=None)
+    return coef.T
+
+def predict(coef, n_points, days=PREDICTION_DAYS):
+    future = _design(n_points, np.arange(n_points, n_points + days))
+    return np.atleast_2d(coef) @ future.T
+
+def forecast_many(histories, days=PREDICTION_DAYS):
+    # {symbol: history} -> {symbol: predictions}. Coefficients are cached by
+    # a digest of the fitted closes, so a still-trading daily bar (same
+    # timestamp, moving close) or a re-adjusted history refits; misses are
+    # grouped by history length and each group is fitted as one stacked solve.
+    result, pending = {}, {}
+    for symbol, hist in histories.items():
+        if hist is None or hist.empty: continue
+        closes = hist['Close'].to_numpy(dtype=float)
+        key = (symbol, len(hist), hashlib.blake2b(closes.tobytes(), digest_size=16).digest())
+        coef = _coef_cache.get(key)
+        if coef is None: pending.setdefault(len(hist), []).append((symbol, key, closes))
+        else: result[symbol] = predict(coef, len(hist), days)[0]
+    for n_points, group in pending.items():
+        coefs = fit(np.vstack([closes for _, _, closes in group]))
+        preds = predict(coefs, n_points, days)
+        for (symbol, key, _), coef, pred in zip(group, coefs, preds):
+            _coef_cache.put(key, coef, COEF_TTL)
+            result[symbol] = pred
+    return result
+
+def forecast_response(symbol, hist, predictions, columnar=False):
+    last_date = pd.Timestamp(hist.index[-1])
+    last_close = hist['Close'].iloc[-1]
+    result = []
+    for i, p in enumerate(predictions, start=1):
+        d = last_date + pd.Timedelta(days=i)
+        result.append({"date": d.strftime("%Y-%m-%d"), "predicted_price": round(float(p), 2), "action": "BUY" if p > last_close else "SELL"})
+    if columnar: result = record_columns(result, ["predicted_price", "action"])
+    return {"symbol": symbol.upper(), "prediction_days": len(predictions), "predictions": result, "trend": "Upward" if predictions[-1] > predictions[0] else "Downward"}
@@ -0,0 +1,273 @@
+import math
+from collections import deque
+import numpy as np
+
+NAN = float("nan")
+
+class _EMA:
+    # Same recursion as pandas ewm(adjust=False) with min_periods=`min_periods`
+    def __init__(self, alpha, min_periods):
+        self.alpha, self.min_periods = alpha, min_periods
+        self.value, self.count = None, 0
+
+    def state(self): return (self.value, self.count)
+    def restore(self, state): self.value, self.count = state
+
+    def update(self, x):
+        if x is None or math.isnan(x):
+            return self.current()
+        self.value = x if self.value is None else self.alpha * x + (1 - self.alpha) * self.value
+        self.count += 1
+        return self.current()
+
+    def current(self):
+        return self.value if self.count >= self.min_periods else NAN
+
+class StreamingIndicators:
+    # Wilder RSI, EMA MACD/signal and rolling Bollinger stats, updated in O(1)
+    # per bar and matching ta's RSIIndicator/MACD/BollingerBands defaults.
+    # update() appends a bar; revise() replaces the close of the latest bar,
+    # for the still-forming bar at the end of an intraday series.
+    def __init__(self, rsi_window=14, macd_fast=12, macd_slow=26, macd_sign=9, bb_window=20, bb_dev=2):
+        self.bb_window, self.bb_dev = bb_window, bb_dev
+        self._up = _EMA(1 / rsi_window, rsi_window)
+        self._dn = _EMA(1 / rsi_window, rsi_window)
+        self._fast = _EMA(2 / (macd_fast + 1), macd_fast)
+        self._slow = _EMA(2 / (macd_slow + 1), macd_slow)
+        self._sign = _EMA(2 / (macd_sign + 1), macd_sign)
+        self._window = deque(maxlen=bb_window)
+        self._prev_close = None
+        self._saved = None
+        self.last_ts = None
+        self.close = self.rsi = self.macd = self.macd_signal = self.macd_diff = NAN
+        self.bb_mavg = self.bb_hband = self.bb_lband = self.bb_pband = NAN
+
+    @classmethod
+    def seed(cls, closes, timestamps=None, **kwargs):
+        ind = cls._seed_rows([np.asarray(closes, dtype=float)], **kwargs)[0]
+        if timestamps is not None and len(timestamps): ind.last_ts = timestamps[-1]
+        return ind
+
+    @classmethod
+    def seed_many(cls, closes, **kwargs):
+        # {symbol: timestamp-indexed closes} -> {symbol: StreamingIndicators}
+        symbols = list(closes)
+        seeded = cls._seed_rows([closes[s].to_numpy(dtype=float) for s in symbols], **kwargs)
+        for s, ind in zip(symbols, seeded):
+            if len(closes[s]): ind.last_ts = closes[s].index[-1]
+        return dict(zip(symbols, seeded))
+
+    @classmethod
+    def _seed_rows(cls, rows, **kwargs):
+        # One panel kernel pass over all but each row's last close restores
+        # the recursive state; the last close goes through update() so that
+        # revise() can still replace it.
+        rows = [row[~np.isnan(row)] for row in rows]
+        seeded = [cls(**kwargs) for _ in rows]
+        width = max((len(row) - 1 for row in rows), default=0)
+        if width > 0:
+            panel = np.full((len(rows), width), np.nan)
+            for i, row in enumerate(rows): panel[i, :len(row) - 1] = row[:-1]
+            ind = seeded[0]
+            r = _recursions(panel, ind._up.min_periods, ind._fast.min_periods, ind._slow.min_periods, ind._sign.min_periods, 20)
+            for i, (row, ind) in enumerate(zip(rows, seeded)):
+                m = len(row) - 1
+                if m <= 0: continue
+                for ema, name in ((ind._up, "up"), (ind._dn, "dn"), (ind._fast, "fast"), (ind._slow, "slow")):
+                    ema.restore((float(r[name][i, m - 1]), m))
+                if m > r["macd_start"]: ind._sign.restore((float(r["sign"][i, m - 1]), m - r["macd_start"]))
+                ind._window.extend(row[max(0, m - ind.bb_window):m].tolist())
+                ind._prev_close = float(row[m - 1])
+        for row, ind in zip(rows, seeded):
+            if len(row): ind.update(float(row[-1]))
+        return seeded
+
+    def _state(self):
+        return (self._up.state(), self._dn.state(), self._fast.state(), self._slow.state(), self._sign.state(),
+                self._window[0] if len(self._window) == self.bb_window else None, self._prev_close)
+
+    def update(self, close):
+        self._saved = self._state()
+        self._apply(close)
+
+    def revise(self, close):
+        if self._saved is None: return self.update(close)
+        up, dn, fast, slow, sign, evicted, self._prev_close = self._saved
+        self._up.restore(up); self._dn.restore(dn)
+        self._fast.restore(fast); self._slow.restore(slow); self._sign.restore(sign)
+        self._window.pop()
+        if evicted is not None: self._window.appendleft(evicted)
+        self._apply(close)
+
+    def _apply(self, close):
+        diff = 0.0 if self._prev_close is None else close - self._prev_close
+        up = self._up.update(max(diff, 0.0))
+        dn = self._dn.update(max(-diff, 0.0))
+        self.rsi = 100.0 if dn == 0 else 100 - 100 / (1 + up / dn)
+        self._prev_close = self.close = close
+
+        fast, slow = self._fast.update(close), self._slow.update(close)
+        self.macd = fast - slow
+        self.macd_signal = self._sign.update(self.macd)
+        self.macd_diff = self.macd - self.macd_signal
+
+        # The window is a fixed bb_window bars, so summing it directly stays
+        # O(1) per bar and avoids the drift of running sum/sum-of-squares.
+        self._window.append(close)
+        if len(self._window) == self.bb_window:
+            n = self.bb_window
+            self.bb_mavg = sum(self._window) / n
+            std = math.sqrt(sum((x - self.bb_mavg) ** 2 for x in self._window) / n)
+            self.bb_hband = self.bb_mavg + self.bb_dev * std
+            self.bb_lband = self.bb_mavg - self.bb_dev * std
+            width = self.bb_hband - self.bb_lband
+            self.bb_pband = (close - self.bb_lband) / width if width != 0 else NAN
+
+    def sync(self, closes):
+        # Feeds bars of a timestamp-indexed close series newer than last_ts,
+        # revising the latest bar if it is still being formed.
+        if self.last_ts is None: return self._feed(closes)
+        if closes.index[-1] < self.last_ts: return
+        if closes.index[-1] == self.last_ts:
+            self.revise(float(closes.iloc[-1]))
+            return
+        start = closes.index.searchsorted(self.last_ts)
+        if start < len(closes) and closes.index[start] == self.last_ts:
+            self.revise(float(closes.iloc[start]))
+            start += 1
+        self._feed(closes.iloc[start:])
+
+    def _feed(self, closes):
+        for x in closes.to_numpy(dtype=float): self.update(float(x))
+        if len(closes): self.last_ts = closes.index[-1]
+
+# --- PANEL KERNEL ---
+# Every indicator the app uses, for a whole (symbols x time) close panel in
+# one pass: the recursive ones (RSI, MACD, EMA) advance all symbols together
+# bar by bar, the rolling ones (SMA, Bollinger) are sums of shifted slices.
+# NaN closes are skipped per row, so each row matches ta run on that
+# symbol's own series, and the recursions follow _EMA's op order, so RSI and
+# MACD agree bit for bit with StreamingIndicators fed the same closes
+# (checked by bench.parity).
+INDICATORS = ["sma_20", "sma_50", "ema_20", "rsi", "macd", "macd_signal", "macd_diff", "bb_mavg", "bb_hband", "bb_lband", "bb_pband"]
+
+SCALAR_LANES = 16 # series below which _ema loops in plain floats
+
+def _pack(close):
+    # Moves each row's valid closes to the front, in order; None if they
+    # already are (one history per row, right-padded)
+    valid = ~np.isnan(close)
+    if not (valid[:, 1:] & ~valid[:, :-1]).any(): return close, None
+    order = np.argsort(~valid, axis=1, kind="stable")
+    return np.take_along_axis(close, order, axis=1), order
+
+def _unpack(values, order, close):
+    if order is None: out = values
+    else:
+        out = np.empty_like(values)
+        np.put_along_axis(out, order, values, axis=1)
+    out[np.isnan(close)] = np.nan
+    return out
+
+def _ema(x, alpha, start=0):
+    # ewm(adjust=False) recursion down the time-major axis 0 from row
+    # `start`, alpha broadcast over the rest. Packed rows all start
+    # together, so there is no per-symbol seeding; the caller applies
+    # min_periods. Two in-place ufunc calls per bar for the whole panel.
+    out = np.full(x.shape, np.nan)
+    if len(x) <= start: return out
+    if x[0].size <= SCALAR_LANES:
+        # One symbol's page: the per-bar ufunc overhead would dominate, so
+        # run each series as a plain float loop (same ops, same results)
+        lanes = out.reshape(len(out), -1)
+        for j, (a, seq) in enumerate(zip(np.broadcast_to(alpha, x.shape[1:]).ravel().tolist(), x.reshape(len(x), -1).T.tolist())):
+            keep, value = 1 - a, seq[start]
+            column = [value]
+            for v in seq[start + 1:]:
+                value = a * v + keep * value
+                column.append(value)
+            lanes[start:, j] = column
+        return out
+    keep = 1 - alpha
+    step = alpha * x
+    out[start] = x[start]
+    for t in range(start + 1, len(x)):
+        np.multiply(out[t - 1], keep, out=out[t])
+        out[t] += step[t]
+    return out
+
+def _recursions(close, rsi_window, macd_fast, macd_slow, macd_sign, ema_window):
+    # Raw EMA layers of a packed (symbols x time) panel, before min_periods
+    close_t = np.ascontiguousarray(close.T)
+    diff = np.diff(close_t, axis=0, prepend=close_t[:1])
+    alpha = np.array([1 / rsi_window, 1 / rsi_window, 2 / (macd_fast + 1), 2 / (macd_slow + 1), 2 / (ema_window + 1)])[:, None]
+    layers = _ema(np.stack([np.maximum(diff, 0.0), np.maximum(-diff, 0.0), close_t, close_t, close_t], axis=1), alpha)
+    up, dn, fast, slow, ema = (layers[:, k].T for k in range(5))
+    macd_start = max(macd_fast, macd_slow) - 1
+    macd = fast - slow
+    macd[:, :macd_start] = np.nan
+    return {"up": up, "dn": dn, "fast": fast, "slow": slow, "ema": ema, "macd": macd,
+            "sign": _ema(np.ascontiguousarray(macd.T), 2 / (macd_sign + 1), macd_start).T, "macd_start": macd_start}
+
+def _rolling(close, window, std=False):
+    # Window sums as `window` shifted-slice adds, in the same order as
+    # StreamingIndicators' sum() and without running-sum drift
+    mean = np.full(close.shape, np.nan)
+    dev = np.full(close.shape, np.nan) if std else None
+    n = close.shape[1] - window + 1
+    if n > 0:
+        total = close[:, :n].copy()
+        for j in range(1, window): total += close[:, j:j + n]
+        mean[:, window - 1:] = total / window
+        if std:
+            center = mean[:, window - 1:]
+            total = np.square(close[:, :n] - center)
+            for j in range(1, window): total += np.square(close[:, j:j + n] - center)
+            dev[:, window - 1:] = np.sqrt(total / window)
+    return mean, dev
+
+def indicator_panel(close, rsi_window=14, macd_fast=12, macd_slow=26, macd_sign=9, bb_window=20, bb_dev=2):
+    # close: (symbols x time) array, or one symbol's 1-D closes. Returns
+    # {name: array shaped like close} for every name in INDICATORS, with
+    # ta's defaults (sma_20/ema_20/sma_50 are fixed windows).
+    close = np.asarray(close, dtype=float)
+    single = close.ndim == 1
+    if single: close = close[None, :]
+    packed, order = _pack(close)
+    r = _recursions(packed, rsi_window, macd_fast, macd_slow, macd_sign, 20)
+
+    def warm(values, min_periods):
+        values[:, :min_periods - 1] = np.nan
+        return values
+
+    emaup, emadn = warm(r["up"], rsi_window), warm(r["dn"], rsi_window)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rsi = np.where(emadn == 0, 100.0, 100 - 100 / (1 + emaup / emadn))
+    macd = warm(r["fast"], macd_fast) - warm(r["slow"], macd_slow)
+    signal = warm(r["sign"], r["macd_start"] + macd_sign)
+    bb_mavg, std = _rolling(packed, bb_window, std=True)
+    hband, lband = bb_mavg + bb_dev * std, bb_mavg - bb_dev * std
+    with np.errstate(divide="ignore", invalid="ignore"):
+        pband = (packed - lband) / np.where(hband != lband, hband - lband, np.nan)
+    out = {
+        "sma_20": _rolling(packed, 20)[0] if bb_window != 20 else bb_mavg.copy(),
+        "sma_50": _rolling(packed, 50)[0],
+        "ema_20": warm(r["ema"], 20),
+        "rsi": rsi,
+        "macd": macd,
+        "macd_signal": signal,
+        "macd_diff": macd - signal,
+        "bb_mavg": bb_mavg,
+        "bb_hband": hband,
+        "bb_lband": lband,
+        "bb_pband": pband,
+    }
+    out = {name: _unpack(values, order, close) for name, values in out.items()}
+    return {name: values[0] for name, values in out.items()} if single else out
+
+def last_valid(values, close):
+    # Each row's value at its last valid close (NaN for empty rows)
+    close = np.atleast_2d(close)
+    valid = ~np.isnan(close)
+    at = close.shape[1] - 1 - np.argmax(valid[:, ::-1], axis=1)
+    return np.where(valid.any(axis=1), np.atleast_2d(values)[np.arange(len(close)), at], np.nan)
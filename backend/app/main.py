@@ -1,21 +1,38 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Query, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-import yfinance as yf
 import pandas as pd
 import numpy as np
-from ta.trend import SMAIndicator, EMAIndicator, MACD
-from ta.momentum import RSIIndicator
-from ta.volatility import BollingerBands
-from sklearn.linear_model import LinearRegression
-from sklearn.preprocessing import PolynomialFeatures
-from sklearn.pipeline import make_pipeline
-import concurrent.futures
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from datetime import datetime, timedelta
+import asyncio
+import os
 import threading
 import time
-from datetime import datetime, timedelta
 import pytz
-
-app = FastAPI()
+from typing import Annotated, List
+
+from .market_data import market_data
+from . import metrics
+from .metrics import stage
+from .indicators import StreamingIndicators, indicator_panel
+from .screener import SnapshotRefresher, screen
+from . import strategy
+from .scheduler import TraderScheduler
+from .stream import Broadcaster, PeriodicPublisher
+from .portfolio import PortfolioStore
+from .replay import replay
+from .synthetic import SyntheticMarket
+from .forecast import PREDICTION_DAYS, forecast_many, forecast_response
+from .options import DEFAULT_EXPIRIES, calculate_option_price, chain_strikes, option_chain, price_options
+from .serialization import bar_columns, bars_etag, not_modified, record_columns, wants_columnar
+from . import research
+from .backtest import DEFAULT_PARAMS, INITIAL_BALANCE, LOOKBACK_WINDOW, MAX_COMBINATIONS, WARMUP_BARS, grid_size, param_grid, simulate, strategy_inputs, sweep, trade_log
+
+class TimedJSONResponse(JSONResponse):
+    def render(self, content):
+        with stage("serialize"): return super().render(content)
+
+app = FastAPI(default_response_class=TimedJSONResponse)
 
 app.add_middleware(
     CORSMiddleware,
@@ -23,24 +40,59 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Snapshot-Age", "Server-Timing", "ETag"],
 )
 
+# --- INSTRUMENTATION ---
+# Server-Timing is added for every response when TRADEMIND_TIMING_HEADER=1,
+# otherwise only for requests that send "X-Request-Timing: 1".
+TIMING_HEADER = os.environ.get("TRADEMIND_TIMING_HEADER") == "1"
+
+@app.middleware("http")
+async def record_request_timing(request, call_next):
+    stages, token = metrics.begin_request()
+    started = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+    finally:
+        elapsed = time.perf_counter() - started
+        metrics.end_request(token)
+        route = request.scope.get("route")
+        endpoint = getattr(route, "path", "unmatched")
+        totals = {}
+        for name, seconds in stages: totals[name] = totals.get(name, 0.0) + seconds
+        metrics.REQUEST_SECONDS.observe(elapsed, endpoint=endpoint, method=request.method, status=status)
+        for name, seconds in totals.items(): metrics.STAGE_SECONDS.observe(seconds, endpoint=endpoint, stage=name)
+    if TIMING_HEADER or request.headers.get("x-request-timing") == "1":
+        response.headers["Server-Timing"] = metrics.server_timing(totals.items(), elapsed)
+    return response
+
 SCREENER_TICKERS = [
     "AAPL", "MSFT", "GOOGL", "AMZN", "TSLA", "NVDA", "META", "NFLX", "AMD", "INTC",
     "IBM", "ORCL", "CSCO", "QCOM", "TXN", "ADBE", "CRM", "AVGO", "PYPL", "SQ",
     "SHOP", "SPOT", "UBER", "ABNB", "PLTR", "COIN", "HOOD", "ROKU", "ZM", "DOCU"
 ]
 
+SCREENER_REFRESH_SECONDS = 300
+screener_snapshot = SnapshotRefresher(SCREENER_TICKERS, interval=SCREENER_REFRESH_SECONDS)
+
 # --- PORTFOLIO STATE ---
-portfolio = {
-    "balance": 15000.0,
-    "positions": [],
-    "history": []
-}
+portfolio = PortfolioStore() # replays the trade journal on startup
+HISTORY_PAGE_MAX = 500     # closed trades per page
 
 active_traders = {} # { "TSLA": True }
 trader_logs = {}    # { "TSLA": "Scanning... RSI: 45" }
-trader_pnl = {}     # { "TSLA": 150.00 }
+trader_pnl = portfolio.realized_pnl() # { "TSLA": 150.00 }
+trader_indicators = {}  # { "TSLA": StreamingIndicators }
+
+# --- LIVE UPDATES ---
+# /api/stream pushes trader state after every tick, fills as they happen and
+# mark-to-market snapshots every STREAM_MARK_SECONDS (only while a client is
+# connected). Every viewer receives the same encoded event.
+STREAM_MARK_SECONDS = float(os.environ.get("TRADEMIND_STREAM_MARK_SECONDS", 5))
+events = Broadcaster(clients_gauge=metrics.STREAM_CLIENTS)
 
 def get_next_market_open():
     # Simple logic: Market opens Mon-Fri 9:30 AM EST
@@ -74,121 +126,129 @@ def is_market_open():
     
     return start <= now <= end
 
-def get_val(series):
-    if series is None or series.empty: return 0
-    val = series.iloc[-1]
-    return val if not pd.isna(val) else 0
+def history_period(bars):
+    # Shortest daily period that still covers `bars` bars
+    for period, n in (("1y", 250), ("2y", 500), ("5y", 1250), ("10y", 2500)):
+        if bars <= n: return period
+    return "max"
+
+def get_val(values):
+    if values is None or len(values) == 0: return 0
+    val = values[-1]
+    return float(val) if not pd.isna(val) else 0
+
+def needs_seed(ind, close):
+    # Indicator state belongs to one session; a new day starts over
+    return ind is None or ind.last_ts is None or ind.last_ts.date() != close.index[0].date()
+
+def seed_sessions(hists):
+    # Symbols starting a session are seeded together in one kernel pass
+    closes = {s: h['Close'] for s, h in hists.items() if h is not None and not h.empty and needs_seed(trader_indicators.get(s), h['Close'])}
+    if closes: trader_indicators.update(StreamingIndicators.seed_many(closes))
+
+def trade_symbol(symbol, hist):
+    if hist is None or hist.empty: return
+    # Indicators are seeded once per session, then advanced by the new bars only
+    close = hist['Close']
+    ind = trader_indicators.get(symbol)
+    if needs_seed(ind, close):
+        ind = trader_indicators[symbol] = StreamingIndicators.seed(close.to_numpy(), close.index)
+    else:
+        ind.sync(close)
+    current_price = ind.close
+    rsi = ind.rsi
+    macd_diff = ind.macd_diff
+
+    status_msg = f"Price: ${round(current_price, 2)} | RSI: {round(rsi, 1)} | MACD: {round(macd_diff, 2)}"
+
+    existing_pos = portfolio.position(symbol)
+
+    if not existing_pos:
+        contract_type = str(strategy.entry_type(rsi, macd_diff)) or None
+        if contract_type == "CALL": status_msg = "🚀 BUY SIGNAL: Oversold + Momentum!"
+        elif contract_type == "PUT": status_msg = "🔻 SELL SIGNAL: Overbought + Momentum!"
+        else: status_msg += " (Waiting for setup...)"
+
+        trader_logs[symbol] = status_msg
+
+        if contract_type:
+            strike = float(strategy.entry_strike(current_price, contract_type))
+            entry_price = calculate_option_price(current_price, strike, strategy.OPTION_DAYS, strategy.OPTION_VOLATILITY, contract_type)
+            quantity = strategy.CONTRACTS
+            cost = entry_price * quantity * 100
+
+            if portfolio.open_position({
+                "symbol": symbol,
+                "type": contract_type,
+                "strike": strike,
+                "entry_price": entry_price,
+                "quantity": quantity,
+                "cost": cost,
+                "entry_time": str(pd.Timestamp.now()),
+                "status": "OPEN"
+            }):
+                trader_logs[symbol] = f"EXECUTED: Bought {quantity} {contract_type}s @ ${entry_price}"
+                publish_fill("OPEN", portfolio.position(symbol))
+
+    else:
+        current_opt_price = calculate_option_price(current_price, existing_pos['strike'], strategy.OPTION_DAYS, strategy.OPTION_VOLATILITY, existing_pos['type'])
+        pnl_percent = ((current_opt_price - existing_pos['entry_price']) / existing_pos['entry_price']) * 100
+
+        status_msg += f" | Position P/L: {round(pnl_percent, 1)}%"
+        trader_logs[symbol] = status_msg
+
+        reason = str(strategy.exit_reason(existing_pos['type'], pnl_percent, rsi, macd_diff))
+        if reason:
+            closed = portfolio.close_position(symbol, current_opt_price, reason, str(pd.Timestamp.now()))
+            if closed:
+                trader_pnl[symbol] = trader_pnl.get(symbol, 0.0) + closed['profit']
+                trader_logs[symbol] = f"CLOSED Trade: ${closed['profit']} Profit ({reason})"
+                publish_fill("CLOSE", closed)
+
+def auto_trader_tick(symbols):
+    # 1. Check Market Hours
+    if not is_market_open():
+        next_open = get_next_market_open()
+        for symbol in symbols: trader_logs[symbol] = f"😴 Market Closed. Sleeping until {next_open}..."
+        return 60 # Sleep for a minute and check again
+
+    # 2. One batched fetch for every active symbol, then evaluate each
+    try:
+        with stage("trader_fetch"): hists = market_data.history_many(symbols, period="1d", interval="5m")
+    except Exception as e:
+        for symbol in symbols: trader_logs[symbol] = f"Error: {str(e)}"
+        return 10
+
+    with stage("trader_evaluate"):
+        seed_sessions({s: hists.get(s) for s in symbols if active_traders.get(s)})
+        for symbol in symbols:
+            if not active_traders.get(symbol): continue # stopped mid-tick
+            try:
+                trade_symbol(symbol, hists.get(symbol))
+            except Exception as e:
+                trader_logs[symbol] = f"Error: {str(e)}"
+    return 10
+
+def trader_state():
+    return {
+        "active_traders": [s for s, active in list(active_traders.items()) if active],
+        "trader_logs": dict(trader_logs),
+        "trader_pnl": dict(trader_pnl)
+    }
 
-def calculate_option_price(stock_price, strike, expiry_days, volatility, type="CALL"):
-    intrinsic = max(0, stock_price - strike) if type == "CALL" else max(0, strike - stock_price)
-    time_val = (stock_price * volatility * np.sqrt(expiry_days / 365)) * 0.4 
-    noise = np.random.uniform(-0.05, 0.05)
-    return round(intrinsic + time_val + noise, 2)
+def publish_trader_state():
+    events.publish("trader", trader_state(), retain=True)
 
-def auto_trader_loop(symbol):
-    print(f"🤖 Auto-Trader Started for {symbol}")
-    trader_logs[symbol] = "Initializing..."
-    if symbol not in trader_pnl: trader_pnl[symbol] = 0.0
-    
-    while active_traders.get(symbol):
-        # 1. Check Market Hours
-        if not is_market_open():
-            next_open = get_next_market_open()
-            trader_logs[symbol] = f"😴 Market Closed. Sleeping until {next_open}..."
-            time.sleep(60) # Sleep for a minute and check again
-            continue
+def publish_fill(side, position):
+    events.publish("fill", {**position, "side": side})
+    portfolio_publisher.wake() # balance and positions changed
 
-        try:
-            ticker = yf.Ticker(symbol)
-            hist = ticker.history(period="1d", interval="5m")
-            
-            if not hist.empty:
-                current_price = hist['Close'].iloc[-1]
-                rsi = RSIIndicator(hist['Close'], window=14).rsi().iloc[-1]
-                macd = MACD(hist['Close'])
-                macd_diff = macd.macd_diff().iloc[-1]
-                
-                status_msg = f"Price: ${round(current_price, 2)} | RSI: {round(rsi, 1)} | MACD: {round(macd_diff, 2)}"
-                
-                existing_pos = next((p for p in portfolio['positions'] if p['symbol'] == symbol), None)
-                
-                if not existing_pos:
-                    if rsi < 30 and macd_diff > 0: 
-                        contract_type = "CALL"
-                        status_msg = "🚀 BUY SIGNAL: Oversold + Momentum!"
-                    elif rsi > 70 and macd_diff < 0: 
-                        contract_type = "PUT"
-                        status_msg = "🔻 SELL SIGNAL: Overbought + Momentum!"
-                    else:
-                        contract_type = None
-                        status_msg += " (Waiting for setup...)"
-
-                    trader_logs[symbol] = status_msg
-                    
-                    if contract_type:
-                        strike = round(current_price * 1.02, 0) if contract_type == "CALL" else round(current_price * 0.98, 0)
-                        entry_price = calculate_option_price(current_price, strike, 7, 0.4, contract_type)
-                        quantity = 10
-                        cost = entry_price * quantity * 100
-                        
-                        if portfolio['balance'] >= cost:
-                            portfolio['balance'] -= cost
-                            portfolio['positions'].append({
-                                "symbol": symbol,
-                                "type": contract_type,
-                                "strike": strike,
-                                "entry_price": entry_price,
-                                "quantity": quantity,
-                                "cost": cost,
-                                "entry_time": str(pd.Timestamp.now()),
-                                "status": "OPEN"
-                            })
-                            trader_logs[symbol] = f"EXECUTED: Bought {quantity} {contract_type}s @ ${entry_price}"
-                
-                else:
-                    current_opt_price = calculate_option_price(current_price, existing_pos['strike'], 7, 0.4, existing_pos['type'])
-                    pnl_percent = ((current_opt_price - existing_pos['entry_price']) / existing_pos['entry_price']) * 100
-                    
-                    status_msg += f" | Position P/L: {round(pnl_percent, 1)}%"
-                    trader_logs[symbol] = status_msg
-                    
-                    should_close = False
-                    reason = ""
-                    
-                    if pnl_percent >= 20: 
-                        should_close = True
-                        reason = "TAKE PROFIT"
-                    elif pnl_percent <= -10:
-                        should_close = True
-                        reason = "STOP LOSS"
-                    elif existing_pos['type'] == "CALL" and (rsi > 70 or macd_diff < 0):
-                        should_close = True
-                        reason = "REVERSAL"
-                    elif existing_pos['type'] == "PUT" and (rsi < 30 or macd_diff > 0):
-                         should_close = True
-                         reason = "REVERSAL"
-
-                    if should_close:
-                        revenue = current_opt_price * existing_pos['quantity'] * 100
-                        profit = revenue - existing_pos['cost']
-                        
-                        trader_pnl[symbol] += profit
-                        portfolio['balance'] += revenue
-                        portfolio['history'].append({
-                            **existing_pos,
-                            "exit_price": current_opt_price,
-                            "exit_time": str(pd.Timestamp.now()),
-                            "profit": round(profit, 2),
-                            "reason": reason,
-                            "status": "CLOSED"
-                        })
-                        portfolio['positions'].remove(existing_pos)
-                        trader_logs[symbol] = f"CLOSED Trade: ${round(profit, 2)} Profit ({reason})"
-
-        except Exception as e:
-            trader_logs[symbol] = f"Error: {str(e)}"
-        
-        time.sleep(10) 
+def run_trader_tick(symbols):
+    delay = auto_trader_tick(symbols)
+    publish_trader_state()
+    return delay
+
+trader_scheduler = TraderScheduler(run_trader_tick, lambda: [s for s, active in list(active_traders.items()) if active])
 
 def analyze_stock(
     symbol: str,
@@ -204,136 +264,191 @@ def analyze_stock(
     sector: str = None
 ):
     try:
-        ticker = yf.Ticker(symbol)
-        info = ticker.info # Fetch info once
-        
-        # Apply filters as early as possible
-        current_price = info.get('currentPrice')
-        if current_price is None: return None
-        if min_price is not None and current_price < min_price: return None
-        if max_price is not None and current_price > max_price: return None
-        
-        market_cap = info.get('marketCap')
-        if market_cap is None: return None # Must have market cap for filtering
-        if min_market_cap is not None and market_cap < min_market_cap: return None
-        if max_market_cap is not None and market_cap > max_market_cap: return None
-
-        current_volume = info.get('volume')
-        if current_volume is None: return None # Must have volume for filtering
-        if min_volume is not None and current_volume < min_volume: return None
-        if max_volume is not None and current_volume > max_volume: return None
-
-        stock_sector = info.get('sector')
-        if sector is not None and stock_sector != sector: return None
-
-        hist = ticker.history(period="6mo")
-        if hist.empty or len(hist) < 50: return None
-        
-        close = hist['Close']
-        rsi = RSIIndicator(close, window=14).rsi().iloc[-1]
-        macd = MACD(close)
-        macd_diff = macd.macd_diff().iloc[-1]
-        bb = BollingerBands(close)
-        bb_percent = bb.bollinger_pband().iloc[-1]
-
-        # Apply RSI filter
-        if min_rsi is not None and rsi < min_rsi: return None
-        if max_rsi is not None and rsi > max_rsi: return None
-
-        # Apply MACD signal filter
-        if macd_signal == "bullish" and macd_diff <= 0: return None
-        if macd_signal == "bearish" and macd_diff >= 0: return None
-        
-        signal, score = "Neutral", 0
-        if rsi < 30: score += 2
-        if rsi > 50 and rsi < 70: score += 1
-        if macd_diff > 0: score += 2
-        if bb_percent < 0.05: score += 3
-        if rsi > 70: score -= 2
-        if rsi < 50 and rsi > 30: score -= 1
-        if macd_diff < 0: score -= 2
-        if bb_percent > 0.95: score -= 3
-        if score >= 3: signal = "Strong Buy"
-        elif score >= 1: signal = "Buy"
-        elif score <= -3: signal = "Strong Sell"
-        elif score <= -1: signal = "Sell"
-        
-        return {
-            "symbol": symbol,
-            "price": round(current_price, 2),
-            "signal": signal,
-            "score": score,
-            "rsi": round(rsi, 2),
-            "macd": round(macd_diff, 2),
-            "market_cap": market_cap,
-            "volume": current_volume,
-            "sector": stock_sector
-        }
+        results = screen([symbol], min_price=min_price, max_price=max_price, min_market_cap=min_market_cap, max_market_cap=max_market_cap,
+                         min_volume=min_volume, max_volume=max_volume, min_rsi=min_rsi, max_rsi=max_rsi, macd_signal=macd_signal, sector=sector)
+        return results[0] if results else None
     except Exception as e:
         # print(f"Error analyzing {symbol}: {e}") # For debugging
+        metrics.ERRORS.inc(where="analyze_stock")
         return None
 
+def preload_bars():
+    # Bring the on-disk bar store up to date for the default universe so
+    # the first requests after a restart are served locally
+    try:
+        with stage("preload"): market_data.preload(SCREENER_TICKERS, period="1y")
+    except Exception as e:
+        print(f"Bar preload failed: {e}")
+
+@app.on_event("startup")
+def start_background_workers():
+    if market_data.store: threading.Thread(target=preload_bars, daemon=True).start()
+    screener_snapshot.start()
+    portfolio_publisher.start()
+
 @app.get("/")
 def read_root(): return {"message": "Tickeron Clone API Active"}
 
+@app.get("/metrics", response_class=PlainTextResponse)
+def get_metrics():
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
 @app.post("/api/trader/start/{symbol}")
 def start_trader(symbol: str):
     if active_traders.get(symbol): return {"message": "Already running"}
+    print(f"🤖 Auto-Trader Started for {symbol}")
+    trader_logs[symbol] = "Initializing..."
+    if symbol not in trader_pnl: trader_pnl[symbol] = 0.0
     active_traders[symbol] = True
-    t = threading.Thread(target=auto_trader_loop, args=(symbol,))
-    t.daemon = True
-    t.start()
+    publish_trader_state()
+    trader_scheduler.start()
+    trader_scheduler.wake()
     return {"message": "Started"}
 
 @app.post("/api/trader/stop/{symbol}")
 def stop_trader(symbol: str):
     active_traders[symbol] = False
+    publish_trader_state()
+    trader_scheduler.wake()
     return {"message": "Stopped"}
 
+REPLAY_MAX_SYMBOLS = 1000 # synthetic universe size cap
+
+@app.post("/api/trader/replay")
+def replay_trader(
+    symbols: List[str] = Query(None),
+    synthetic: Annotated[int, Query(ge=1, le=REPLAY_MAX_SYMBOLS)] = 100,
+    period: str = "1d",
+    seed: int = None,
+    initial_balance: float = None,
+    fills_limit: int = 100
+):
+    # Runs the auto-trader rules over 5m bars on a simulated clock, against a
+    # scratch in-memory portfolio (the live book is untouched): the given
+    # symbols' stored/upstream bars, or `synthetic` generated symbols
+    if symbols and len(symbols) > REPLAY_MAX_SYMBOLS: raise HTTPException(status_code=400, detail=f"At most {REPLAY_MAX_SYMBOLS} symbols per replay")
+    try:
+        if symbols:
+            with stage("fetch"): hists = market_data.history_many(symbols, period=period, interval="5m")
+        else:
+            market = SyntheticMarket(synthetic, seed=seed or 0)
+            hists = market.history_many(market.symbols, period="1d", interval="5m")
+        with stage("replay"): result = replay(hists, rng=seed, initial_balance=initial_balance)
+        result["fills"] = result["fills"][-fills_limit:] if fills_limit > 0 else []
+        return result
+    except Exception as e: raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/api/trader/scheduler")
+def get_trader_scheduler():
+    return trader_scheduler.stats()
+
 @app.post("/api/portfolio/reset")
 def reset_portfolio(amount: float):
-    portfolio['balance'] = amount
-    portfolio['positions'] = []
-    portfolio['history'] = []
+    portfolio.reset(amount)
     active_traders.clear()
     trader_pnl.clear()
+    trader_indicators.clear()
+    publish_trader_state()
+    portfolio_publisher.wake()
     return {"message": f"Portfolio reset to ${amount}"}
 
-@app.get("/api/portfolio")
-def get_portfolio():
-    total_equity = portfolio['balance']
-    updated_positions = []
-    for pos in portfolio['positions']:
+def portfolio_snapshot(history_offset=0, history_limit=20, quotes=None):
+    balance = portfolio.balance
+    positions = portfolio.positions()
+
+    # One batched quote lookup for every held symbol, then price the whole book at once
+    if quotes is None:
         try:
-            ticker = yf.Ticker(pos['symbol'])
-            current_stock_price = ticker.history(period="1d")['Close'].iloc[-1]
-            current_opt_price = calculate_option_price(current_stock_price, pos['strike'], 7, 0.4, pos['type'])
-            market_value = current_opt_price * pos['quantity'] * 100
-            unrealized_pl = market_value - pos['cost']
-            updated_positions.append({
-                **pos,
-                "current_stock_price": round(current_stock_price, 2),
-                "current_opt_price": current_opt_price,
-                "market_value": round(market_value, 2),
-                "unrealized_pl": round(unrealized_pl, 2),
-                "return_pct": round((unrealized_pl / pos['cost']) * 100, 2)
-            })
-            total_equity += market_value
-        except: updated_positions.append(pos)
+            with stage("fetch"): quotes = market_data.quotes([p['symbol'] for p in positions])
+        except Exception: quotes = {}
+    priced = [p for p in positions if p['symbol'] in quotes]
+    total_equity = balance
+    marks = {}
+    with stage("pricing"):
+        if priced:
+            stock_prices = np.array([quotes[p['symbol']] for p in priced])
+            costs = np.array([p['cost'] for p in priced])
+            opt_prices = price_options(stock_prices, [p['strike'] for p in priced], strategy.OPTION_DAYS, strategy.OPTION_VOLATILITY, [p['type'] for p in priced])
+            market_values = opt_prices * np.array([p['quantity'] for p in priced]) * 100
+            unrealized = market_values - costs
+            return_pcts = unrealized / costs * 100
+            total_equity += float(market_values.sum())
+            for k, p in enumerate(priced):
+                marks[p['symbol']] = {
+                    "current_stock_price": round(float(stock_prices[k]), 2),
+                    "current_opt_price": float(opt_prices[k]),
+                    "market_value": round(float(market_values[k]), 2),
+                    "unrealized_pl": round(float(unrealized[k]), 2),
+                    "return_pct": round(float(return_pcts[k]), 2)
+                }
+    updated_positions = [{**p, **marks[p['symbol']]} if p['symbol'] in marks else p for p in positions]
 
     return {
-        "balance": round(portfolio['balance'], 2),
+        "balance": round(balance, 2),
         "equity": round(total_equity, 2),
         "positions": updated_positions,
-        "history": portfolio['history'][-20:],
-        "active_traders": [s for s, active in active_traders.items() if active],
-        "trader_logs": trader_logs,
-        "trader_pnl": trader_pnl
+        "history": portfolio.history(history_offset, history_limit),
+        "history_total": portfolio.history_count(),
+        **trader_state()
     }
 
+portfolio_publisher = PeriodicPublisher(events, "portfolio", portfolio_snapshot, STREAM_MARK_SECONDS)
+events.on_subscribe = portfolio_publisher.wake
+
+@app.get("/api/portfolio")
+async def get_portfolio(history_offset: Annotated[int, Query(ge=0)] = 0, history_limit: Annotated[int, Query(ge=0, le=HISTORY_PAGE_MAX)] = 20):
+    try:
+        with stage("fetch"): quotes = await market_data.aquotes([p['symbol'] for p in portfolio.positions()])
+    except Exception: quotes = {}
+    return portfolio_snapshot(history_offset, history_limit, quotes)
+
+@app.get("/api/stream")
+def stream_updates():
+    # Server-sent events: "portfolio" and "trader" snapshots (the latest of
+    # each is sent on connect), "fill" per executed trade
+    return StreamingResponse(events.subscribe(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@app.get("/api/portfolio/history")
+def get_portfolio_history(offset: Annotated[int, Query(ge=0)] = 0, limit: Annotated[int, Query(ge=0, le=HISTORY_PAGE_MAX)] = 50):
+    return {"total": portfolio.history_count(), "offset": offset, "limit": limit, "items": portfolio.history(offset, limit)}
+
+CHAIN_MAX_STRIKES = 201 # strikes per chain
+CHAIN_MAX_EXPIRIES = 24 # expiries per chain
+
+@app.get("/api/options/{symbol}/chain")
+async def get_option_chain(
+    symbol: str,
+    expiries: List[int] = Query(DEFAULT_EXPIRIES),
+    num_strikes: Annotated[int, Query(ge=1, le=CHAIN_MAX_STRIKES)] = 21,
+    width: Annotated[float, Query(gt=0, lt=1)] = 0.2,
+    volatility: Annotated[float, Query(gt=0)] = 0.4,
+    seed: int = None
+):
+    if len(expiries) > CHAIN_MAX_EXPIRIES: raise HTTPException(status_code=400, detail=f"At most {CHAIN_MAX_EXPIRIES} expiries per chain")
+    if min(expiries, default=0) <= 0: raise HTTPException(status_code=400, detail="expiries must be positive day counts")
+    try:
+        quotes = await market_data.aquotes([symbol])
+        if symbol.upper() not in quotes: raise HTTPException(status_code=404, detail="Stock not found")
+        spot = quotes[symbol.upper()]
+        strikes = chain_strikes(spot, num_strikes, width)
+        calls, puts = option_chain(spot, strikes, expiries, volatility, seed)
+        return {
+            "symbol": symbol.upper(),
+            "spot": round(spot, 2),
+            "volatility": volatility,
+            "strikes": strikes.tolist(),
+            "expiries": list(expiries),
+            "calls": calls.tolist(),
+            "puts": puts.tolist()
+        }
+    except HTTPException: raise
+    except Exception as e: raise HTTPException(status_code=500, detail=str(e))
+
 # --- SCREENER ENDPOINT (MODIFIED) ---
 @app.get("/api/screener")
-def run_screener(
+async def run_screener(
+    response: Response,
     min_price: float = None,
     max_price: float = None,
     min_market_cap: float = None,
@@ -345,11 +460,13 @@ def run_screener(
     macd_signal: str = None,
     sector: str = None
 ):
-    results = []
-    # Use a partial function to pass screener parameters to analyze_stock
-    from functools import partial
-    analyze_stock_with_filters = partial(
-        analyze_stock,
+    # Answered from the precomputed snapshot; its age goes in X-Snapshot-Age.
+    # Before the first snapshot exists get() blocks on the build, so it runs
+    # off the event loop.
+    with stage("fetch"): snapshot = await asyncio.to_thread(screener_snapshot.get)
+    if snapshot is None: raise HTTPException(status_code=503, detail=screener_snapshot.last_error or "Screener snapshot unavailable")
+    response.headers["X-Snapshot-Age"] = f"{snapshot.age:.1f}"
+    with stage("query"): return snapshot.query(
         min_price=min_price,
         max_price=max_price,
         min_market_cap=min_market_cap,
@@ -362,32 +479,45 @@ def run_screener(
         sector=sector
     )
 
-    with concurrent.futures.ThreadPoolExecutor(max_workers=10) as executor:
-        future_to_stock = {executor.submit(analyze_stock_with_filters, sym): sym for sym in SCREENER_TICKERS}
-        for future in concurrent.futures.as_completed(future_to_stock):
-            res = future.result()
-            if res: results.append(res)
-    results.sort(key=lambda x: x['score'], reverse=True)
-    return results
-
+# History is one dict per bar by default; ?format=columnar (or an Accept of
+# application/vnd.trademind.columnar+json) returns one array per field with
+# epoch-ms timestamps instead, optionally as float32. Unchanged data -> 304.
 @app.get("/api/stock/{symbol}")
-def get_stock_data(symbol: str):
+async def get_stock_data(symbol: str, request: Request, response: Response, bars: int = 60, format: str = None, float32: bool = False):
     try:
-        data = yf.Ticker(symbol)
-        hist = data.history(period="1y")
-        if hist.empty: raise HTTPException(status_code=404, detail="Stock not found")
-        close = hist['Close']
-        sma_20 = SMAIndicator(close, window=20).sma_indicator()
-        ema_20 = EMAIndicator(close, window=20).ema_indicator()
-        sma_50 = SMAIndicator(close, window=50).sma_indicator()
-        rsi = RSIIndicator(close, window=14).rsi()
-        macd = MACD(close)
-        bb = BollingerBands(close)
-        
-        rsi_val = get_val(rsi)
-        macd_val = get_val(macd.macd_diff())
-        bb_val = get_val(bb.bollinger_pband())
+        columnar = wants_columnar(request, format)
+        with stage("fetch"):
+            hist = await market_data.ahistory(symbol, period=history_period(bars))
+            if hist.empty: raise HTTPException(status_code=404, detail="Stock not found")
+            etag = bars_etag(symbol, hist, "stock", bars, columnar, float32)
+            if not_modified(request, etag): return Response(status_code=304, headers={"ETag": etag})
+            info = await market_data.ainfo(symbol)
+        with stage("indicators"):
+            close = hist['Close']
+            panel = indicator_panel(close.to_numpy())
+
+            rsi_val = get_val(panel["rsi"])
+            macd_val = get_val(panel["macd_diff"])
+            bb_val = get_val(panel["bb_pband"])
+            indicators = {
+                "rsi": round(rsi_val, 2),
+                "sma_20": round(get_val(panel["sma_20"]), 2),
+                "ema_20": round(get_val(panel["ema_20"]), 2),
+                "sma_50": round(get_val(panel["sma_50"]), 2),
+                "macd": round(get_val(panel["macd"]), 2),
+                "macd_signal": round(get_val(panel["macd_signal"]), 2),
+                "macd_diff": round(macd_val, 2),
+                "bb_upper": round(get_val(panel["bb_hband"]), 2),
+                "bb_lower": round(get_val(panel["bb_lband"]), 2),
+                "bb_percent": round(bb_val, 2),
+            }
         
+        with stage("serialize"):
+            if columnar: history = bar_columns(hist.tail(bars), float32=float32)
+            else: history = hist[['Open', 'High', 'Low', 'Close', 'Volume']].tail(bars).reset_index().to_dict(orient="records")
+        response.headers["ETag"] = etag
+        response.headers["Vary"] = "Accept"
+
         sentiment = "Neutral"
         if rsi_val > 50 and macd_val > 0:
             sentiment = "Bullish"
@@ -400,99 +530,126 @@ def get_stock_data(symbol: str):
 
         return {
             "symbol": symbol.upper(),
-            "name": data.info.get('longName', symbol.upper()),
+            "name": info.get('longName', symbol.upper()),
             "current_price": round(close.iloc[-1], 2),
             "change_percent": 0.0,
-            "market_cap": data.info.get('marketCap', 'N/A'),
-            "volume": data.info.get('volume', 'N/A'),
-            "pe_ratio": data.info.get('trailingPE', 'N/A'),
-            "sector": data.info.get('sector', 'Unknown'),
+            "market_cap": info.get('marketCap', 'N/A'),
+            "volume": info.get('volume', 'N/A'),
+            "pe_ratio": info.get('trailingPE', 'N/A'),
+            "sector": info.get('sector', 'Unknown'),
             "outlook": {"sentiment": sentiment, "confidence": 85, "summary": f"RSI: {round(rsi_val, 1)} | MACD: {round(macd_val, 2)} | BB%: {round(bb_val*100, 1)}%"},
-            "indicators": {
-                "rsi": round(rsi_val, 2),
-                "sma_20": round(get_val(sma_20), 2),
-                "ema_20": round(get_val(ema_20), 2),
-                "sma_50": round(get_val(sma_50), 2),
-                "macd": round(get_val(macd.macd()), 2),
-                "macd_signal": round(get_val(macd.macd_signal()), 2),
-                "macd_diff": round(get_val(macd.macd_diff()), 2),
-                "bb_upper": round(get_val(bb.bollinger_hband()), 2),
-                "bb_lower": round(get_val(bb.bollinger_lband()), 2),
-                "bb_percent": round(get_val(bb.bollinger_pband()), 2),
-            },
-            "history": hist[['Open', 'High', 'Low', 'Close', 'Volume']].tail(60).reset_index().to_dict(orient="records")
+            "indicators": indicators,
+            "history": history
+        }
+    except Exception as e: raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/api/predict")
+async def predict_batch(request: Request, symbols: List[str] = Query(...), format: str = None):
+    # ?symbols=AAPL&symbols=MSFT or ?symbols=AAPL,MSFT
+    symbols = list(dict.fromkeys(s.strip().upper() for item in symbols for s in item.split(",") if s.strip()))
+    try:
+        with stage("fetch"): histories = await market_data.ahistory_many(symbols, period="1y")
+        with stage("model"): forecasts = forecast_many(histories)
+        return {
+            "prediction_days": PREDICTION_DAYS,
+            "results": {s: forecast_response(s, histories[s], forecasts[s], wants_columnar(request, format)) for s in symbols if s in forecasts},
+            "errors": {s: "Stock not found" for s in symbols if s not in forecasts}
         }
     except Exception as e: raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/api/predict/{symbol}")
-def predict_stock(symbol: str):
+async def predict_stock(symbol: str, request: Request, response: Response, format: str = None):
     try:
-        data = yf.Ticker(symbol)
-        hist = data.history(period="1y") 
+        columnar = wants_columnar(request, format)
+        with stage("fetch"): hist = await market_data.ahistory(symbol, period="1y")
         if hist.empty: raise HTTPException(status_code=404, detail="Stock not found")
-        df = hist.reset_index()
-        df['Date'] = pd.to_datetime(df['Date'])
-        df['DateIdx'] = range(len(df))
-        X = df[['DateIdx']].values
-        y = df['Close'].values
-        degree = 2
-        model = make_pipeline(PolynomialFeatures(degree), LinearRegression())
-        model.fit(X, y)
-        last_idx = df['DateIdx'].iloc[-1]
-        future_indices = np.array([last_idx + i for i in range(1, 8)]).reshape(-1, 1)
-        predictions = model.predict(future_indices)
-        last_date = df['Date'].iloc[-1]
-        future_dates = [last_date + pd.Timedelta(days=i) for i in range(1, 8)]
-        result = []
-        last_close = df['Close'].iloc[-1]
-        for d, p in zip(future_dates, predictions):
-            result.append({"date": d.strftime("%Y-%m-%d"), "predicted_price": round(p, 2), "action": "BUY" if p > last_close else "SELL"})
-        return {"symbol": symbol.upper(), "prediction_days": 7, "predictions": result, "trend": "Upward" if predictions[-1] > predictions[0] else "Downward"}
+        etag = bars_etag(symbol, hist, "predict", columnar)
+        if not_modified(request, etag): return Response(status_code=304, headers={"ETag": etag})
+        with stage("model"): predictions = forecast_many({symbol.upper(): hist})[symbol.upper()]
+        response.headers["ETag"] = etag
+        response.headers["Vary"] = "Accept"
+        return forecast_response(symbol, hist, predictions, columnar)
     except Exception as e: raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/api/backtest/{symbol}")
-def backtest_strategy(symbol: str):
+async def backtest_strategy(symbol: str, request: Request, response: Response, format: str = None):
     try:
-        ticker = yf.Ticker(symbol)
-        hist = ticker.history(period="1y")
+        columnar = wants_columnar(request, format)
+        with stage("fetch"): hist = await market_data.ahistory(symbol, period="1y")
         if len(hist) < 100: raise HTTPException(status_code=400, detail="Not enough data")
-        initial_balance = 10000
-        balance = initial_balance
-        shares = 0
-        trades = []
-        wins = 0
-        losses = 0
-        lookback_window = 90
-        data_slice = hist.iloc[-(lookback_window+50):]
-        for i in range(50, len(data_slice)):
-            current_day = data_slice.iloc[i]
-            past_data = data_slice.iloc[:i+1]['Close']
-            rsi = RSIIndicator(past_data, window=14).rsi().iloc[-1]
-            macd = MACD(past_data)
-            macd_diff = macd.macd_diff().iloc[-1]
-            price = current_day['Close']
-            date = current_day.name.strftime("%Y-%m-%d")
-            signal = "HOLD"
-            if rsi < 35 and macd_diff > -0.5: signal = "BUY"
-            elif rsi > 65 or macd_diff < -0.5: signal = "SELL"
-            if signal == "BUY" and balance > 0:
-                shares_to_buy = balance // price
-                if shares_to_buy > 0:
-                    cost = shares_to_buy * price
-                    balance -= cost
-                    shares += shares_to_buy
-                    trades.append({"date": date, "type": "BUY", "price": round(price, 2), "shares": shares_to_buy})
-            elif signal == "SELL" and shares > 0:
-                revenue = shares * price
-                profit = revenue - (trades[-1]['price'] * shares)
-                if profit > 0: wins += 1
-                else: losses += 1
-                balance += revenue
-                shares = 0
-                trades.append({"date": date, "type": "SELL", "price": round(price, 2), "profit": round(profit, 2)})
-        final_value = balance + (shares * hist['Close'].iloc[-1])
-        total_return = ((final_value - initial_balance) / initial_balance) * 100
-        total_trades = wins + losses
-        win_rate = (wins / total_trades * 100) if total_trades > 0 else 0
-        return {"symbol": symbol.upper(), "days_tested": lookback_window, "initial_balance": initial_balance, "final_balance": round(final_value, 2), "return_percent": round(total_return, 2), "total_trades": total_trades, "win_rate": round(win_rate, 1), "trades": trades[-10:]}
+        etag = bars_etag(symbol, hist, "backtest", columnar)
+        if not_modified(request, etag): return Response(status_code=304, headers={"ETag": etag})
+        data_slice = hist.iloc[-(LOOKBACK_WINDOW + WARMUP_BARS):]
+        close = data_slice['Close'].to_numpy()
+        with stage("indicators"): rsi, macd_diff = strategy_inputs(close)
+        params = {k: np.array([v]) for k, v in DEFAULT_PARAMS.items()}
+        with stage("simulate"): result = simulate(close, rsi, macd_diff, params, record=True)
+        trades = trade_log(close, data_slice.index, result)[-10:]
+        if columnar: trades = record_columns(trades, ["type", "price", "shares", "profit"])
+        response.headers["ETag"] = etag
+        response.headers["Vary"] = "Accept"
+        return {"symbol": symbol.upper(), "days_tested": LOOKBACK_WINDOW, "initial_balance": INITIAL_BALANCE, "final_balance": round(float(result['final_balance'][0]), 2), "return_percent": round(float(result['return_percent'][0]), 2), "total_trades": int(result['total_trades'][0]), "win_rate": round(float(result['win_rate'][0]), 1), "trades": trades}
+    except Exception as e: raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/api/backtest/{symbol}/sweep")
+async def backtest_sweep(
+    symbol: str,
+    rsi_buy: List[float] = Query([DEFAULT_PARAMS["rsi_buy"]]),
+    rsi_sell: List[float] = Query([DEFAULT_PARAMS["rsi_sell"]]),
+    macd_buy: List[float] = Query([DEFAULT_PARAMS["macd_buy"]]),
+    macd_sell: List[float] = Query([DEFAULT_PARAMS["macd_sell"]]),
+    days: int = LOOKBACK_WINDOW
+):
+    if grid_size(rsi_buy, rsi_sell, macd_buy, macd_sell) > MAX_COMBINATIONS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_COMBINATIONS} parameter combinations per sweep")
+    try:
+        with stage("fetch"): hist = await market_data.ahistory(symbol, period="1y")
+        if len(hist) < days + WARMUP_BARS: raise HTTPException(status_code=400, detail="Not enough data")
+        close = hist['Close'].iloc[-(days + WARMUP_BARS):].to_numpy()
+        params = param_grid(rsi_buy, rsi_sell, macd_buy, macd_sell)
+        with stage("simulate"): results = await asyncio.to_thread(sweep, close, params) # large grids stay off the event loop
+        results.sort(key=lambda x: x['return_percent'], reverse=True)
+        return {"symbol": symbol.upper(), "days_tested": days, "initial_balance": INITIAL_BALANCE, "combinations": len(results), "results": results}
+    except Exception as e: raise HTTPException(status_code=500, detail=str(e))
+
+# --- BATCH BACKTESTS ---
+# Walk-forward jobs over a universe run on a process pool; results stream
+# from /api/backtest/jobs/{job_id}/stream as each symbol finishes.
+@app.post("/api/backtest/jobs")
+async def create_backtest_job(
+    symbols: List[str] = Query(None),
+    rsi_buy: List[float] = Query([DEFAULT_PARAMS["rsi_buy"]]),
+    rsi_sell: List[float] = Query([DEFAULT_PARAMS["rsi_sell"]]),
+    macd_buy: List[float] = Query([DEFAULT_PARAMS["macd_buy"]]),
+    macd_sell: List[float] = Query([DEFAULT_PARAMS["macd_sell"]]),
+    period: str = "2y",
+    train_bars: int = research.TRAIN_BARS,
+    test_bars: int = research.TEST_BARS
+):
+    if train_bars < 1 or test_bars < 1: raise HTTPException(status_code=400, detail="train_bars and test_bars must be positive")
+    symbols = list(dict.fromkeys(s.upper() for s in symbols)) if symbols else SCREENER_TICKERS
+    if len(symbols) > research.MAX_SYMBOLS: raise HTTPException(status_code=400, detail=f"At most {research.MAX_SYMBOLS} symbols per job")
+    if grid_size(rsi_buy, rsi_sell, macd_buy, macd_sell) > research.MAX_COMBINATIONS:
+        raise HTTPException(status_code=400, detail=f"At most {research.MAX_COMBINATIONS} parameter combinations per job")
+    try:
+        with stage("fetch"): hists = await market_data.ahistory_many(symbols, period=period)
     except Exception as e: raise HTTPException(status_code=500, detail=str(e))
+    closes = {s: h['Close'].to_numpy(dtype=float) for s, h in hists.items() if h is not None and len(h) >= WARMUP_BARS + train_bars + test_bars}
+    if not closes: raise HTTPException(status_code=400, detail="Not enough data")
+    job = research.submit(closes, param_grid(rsi_buy, rsi_sell, macd_buy, macd_sell), train_bars, test_bars)
+    return {"job_id": job.id, "symbols": list(closes), "skipped": [s for s in symbols if s not in closes], "combinations": grid_size(rsi_buy, rsi_sell, macd_buy, macd_sell)}
+
+@app.get("/api/backtest/jobs/{job_id}")
+def get_backtest_job(job_id: str, top: int = 10):
+    job = research.jobs.get(job_id)
+    if job is None: raise HTTPException(status_code=404, detail="Unknown job")
+    return job.summary(top=top, include_symbols=True)
+
+@app.get("/api/backtest/jobs/{job_id}/stream")
+def stream_backtest_job(job_id: str):
+    # "result" per finished symbol, "summary" with running aggregates, then
+    # "done"/"failed"; the stream ends when the job does
+    job = research.jobs.get(job_id)
+    if job is None: raise HTTPException(status_code=404, detail="Unknown job")
+    return StreamingResponse(job.events.subscribe(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
@@ -0,0 +1,383 @@
+import asyncio
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+import numpy as np
+import pandas as pd
+import yfinance as yf
+from .barstore import PERIOD_OFFSETS, BarStore, increment_period
+from .metrics import UPSTREAM_CALLS, UPSTREAM_FAILURES, UPSTREAM_SECONDS
+from .upstream import upstream
+
+# --- PROVIDERS ---
+# Async history goes straight to Yahoo's chart API through the shared pooled,
+# rate-limited client; point TRADEMIND_UPSTREAM_URL at bench/stub_upstream.py
+# to run against a local stand-in.
+CHART_URL = os.environ.get("TRADEMIND_UPSTREAM_URL", "https://query2.finance.yahoo.com").rstrip("/") + "/v8/finance/chart/{symbol}"
+BAR_FIELDS = ["Open", "High", "Low", "Close", "Volume"]
+
+def chart_frame(payload, interval="1d"):
+    # Chart API JSON -> the frame yf.download(auto_adjust=True) would give
+    result = ((payload or {}).get("chart") or {}).get("result") or []
+    if not result or not result[0].get("timestamp"): return pd.DataFrame(columns=BAR_FIELDS)
+    result = result[0]
+    quote = result["indicators"]["quote"][0]
+    index = pd.to_datetime(result["timestamp"], unit="s", utc=True).tz_convert(result["meta"].get("exchangeTimezoneName", "UTC"))
+    intraday = interval[-1] in "mh"
+    if not intraday: index = index.normalize()
+    index.name = "Datetime" if intraday else "Date"
+    hist = pd.DataFrame({f: np.asarray(quote.get(f.lower()) or [np.nan] * len(index), dtype=float) for f in BAR_FIELDS}, index=index)
+    adjclose = (result["indicators"].get("adjclose") or [{}])[0].get("adjclose")
+    if adjclose:
+        ratio = np.asarray(adjclose, dtype=float) / hist['Close'].to_numpy()
+        for f in ("Open", "High", "Low"): hist[f] = hist[f] * ratio
+        hist['Close'] = np.asarray(adjclose, dtype=float)
+    hist = hist.dropna(subset=["Close"])
+    hist['Volume'] = hist['Volume'].fillna(0).astype(np.int64)
+    return hist
+
+class YFinanceProvider:
+    def history(self, symbol, period="1y", interval="1d"):
+        return yf.Ticker(symbol).history(period=period, interval=interval)
+
+    def info(self, symbol):
+        return yf.Ticker(symbol).info
+
+    def history_many(self, symbols, period="1y", interval="1d"):
+        # One multi-ticker download instead of a request per symbol
+        panel = yf.download(symbols, period=period, interval=interval, group_by="ticker", auto_adjust=True,
+                            ignore_tz=False, threads=True, progress=False, multi_level_index=True)
+        if panel is None or panel.empty: return {s: pd.DataFrame() for s in symbols}
+        return {s: panel[s].dropna(how="all") if s in panel.columns.get_level_values(0) else pd.DataFrame() for s in symbols}
+
+    async def ahistory(self, symbol, period="1y", interval="1d"):
+        payload = await upstream.get_json(CHART_URL.format(symbol=symbol), {"range": period, "interval": interval, "events": "div,splits"})
+        return chart_frame(payload, interval)
+
+    async def ahistory_many(self, symbols, period="1y", interval="1d"):
+        # One request per symbol, concurrency and pacing left to `upstream`.
+        # A symbol whose request failed is left out, so it isn't cached or
+        # stored as empty and the next request tries upstream again.
+        hists = await asyncio.gather(*(self.ahistory(s, period, interval) for s in symbols), return_exceptions=True)
+        return {s: h for s, h in zip(symbols, hists) if isinstance(h, pd.DataFrame)}
+
+    def info_many(self, symbols):
+        # Yahoo has no batch fundamentals call, so fan the requests out
+        # concurrently. Failed lookups are left out so they aren't cached.
+        with ThreadPoolExecutor(max_workers=16) as executor:
+            infos = dict(zip(symbols, executor.map(lambda s: _safe_info(self, s), symbols)))
+        return {s: info for s, info in infos.items() if info is not None}
+
+def _safe_info(provider, symbol):
+    try: return provider.info(symbol) or {}
+    except Exception: return None
+
+class CSVProvider:
+    # Offline fixtures: <root>/<SYMBOL>_<interval>.csv with a Date/Datetime index
+    # column plus Open/High/Low/Close/Volume, and optional <root>/<SYMBOL>.json info.
+    def __init__(self, root):
+        self.root = root
+
+    def history(self, symbol, period="1y", interval="1d"):
+        path = os.path.join(self.root, f"{symbol.upper()}_{interval}.csv")
+        if not os.path.exists(path): return pd.DataFrame(columns=["Open", "High", "Low", "Close", "Volume"])
+        hist = pd.read_csv(path, index_col=0, parse_dates=True)
+        hist.index.name = "Datetime" if interval[-1] in "mh" else "Date"
+        if hist.empty or period == "max": return hist
+        last = hist.index[-1]
+        if period == "1d": return hist[hist.index.normalize() == last.normalize()]
+        offset = PERIOD_OFFSETS.get(period)
+        return hist if offset is None else hist[hist.index > last - offset]
+
+    def info(self, symbol):
+        path = os.path.join(self.root, f"{symbol.upper()}.json")
+        if not os.path.exists(path): return {}
+        with open(path) as f: return json.load(f)
+
+    def history_many(self, symbols, period="1y", interval="1d"):
+        return {s: self.history(s, period=period, interval=interval) for s in symbols}
+
+    def info_many(self, symbols):
+        return {s: self.info(s) for s in symbols}
+
+def default_provider():
+    name = os.environ.get("TRADEMIND_DATA_PROVIDER", "yfinance")
+    if name == "csv":
+        return CSVProvider(os.environ.get("TRADEMIND_DATA_DIR", "data"))
+    if name == "synthetic":
+        from .synthetic import SyntheticMarket
+        return SyntheticMarket(seed=int(os.environ.get("TRADEMIND_SYNTHETIC_SEED", 0)))
+    return YFinanceProvider()
+
+def default_store():
+    # TRADEMIND_BAR_STORE=<dir> keeps bars on disk and only fetches new ones
+    root = os.environ.get("TRADEMIND_BAR_STORE")
+    return BarStore(root) if root else None
+
+# --- CACHE ---
+class TTLCache:
+    # LRU-bounded cache whose entries expire after `ttl` seconds. Concurrent
+    # misses on the same key share one in-flight load instead of each calling
+    # the loader; failed loads are not cached.
+    def __init__(self, maxsize=512):
+        self.maxsize = maxsize
+        self._data = OrderedDict()  # key -> (expires_at, value)
+        self._inflight = {}         # key -> Future
+        self._lock = threading.Lock()
+
+    def get_or_load(self, key, loader, ttl):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry and entry[0] > time.monotonic():
+                self._data.move_to_end(key)
+                return entry[1]
+            future = self._inflight.get(key)
+            owner = future is None
+            if owner:
+                future = self._inflight[key] = Future()
+        if not owner: return future.result()
+
+        try:
+            value = loader()
+        except BaseException as e:
+            with self._lock: del self._inflight[key]
+            future.set_exception(e)
+            raise
+        self.put(key, value, ttl)
+        with self._lock: del self._inflight[key]
+        future.set_result(value)
+        return value
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry and entry[0] > time.monotonic():
+                self._data.move_to_end(key)
+                return entry[1]
+        return None
+
+    def put(self, key, value, ttl):
+        with self._lock:
+            self._data[key] = (time.monotonic() + ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize: self._data.popitem(last=False)
+
+    def invalidate(self, key=None):
+        with self._lock:
+            if key is None: self._data.clear()
+            else: self._data.pop(key, None)
+
+# --- MARKET DATA ---
+INTRADAY_TTL = 15     # seconds; intraday bars change every few minutes
+DAILY_TTL = 60
+INFO_TTL = 3600
+QUOTE_TTL = float(os.environ.get("TRADEMIND_QUOTE_TTL", 5)) # repeated portfolio polls within this window are served from memory
+MAX_SYMBOL_LABELS = 1000 # distinct per-symbol metric labels
+
+class MarketData:
+    def __init__(self, provider=None, maxsize=512, store=None):
+        self.provider = provider or default_provider()
+        self.store = store if store is not None else default_store()
+        self.cache = TTLCache(maxsize)
+        self._pending = {} # cache key -> asyncio.Future of an in-flight async load
+        self._labelled = set() # symbols with their own upstream metric label
+
+    def history(self, symbol, period="1y", interval="1d", ttl=None):
+        symbol = symbol.upper()
+        if ttl is None: ttl = INTRADAY_TTL if interval[-1] in "mh" else DAILY_TTL
+        if self.store: loader = lambda: self._stored_history([symbol], period, interval)[symbol]
+        else: loader = lambda: self._upstream("history", [symbol], lambda: self.provider.history(symbol, period=period, interval=interval))
+        return self.cache.get_or_load(("history", symbol, period, interval), loader, ttl)
+
+    def info(self, symbol, ttl=INFO_TTL):
+        symbol = symbol.upper()
+        return self.cache.get_or_load(("info", symbol), lambda: self._upstream("info", [symbol], lambda: self.provider.info(symbol)) or {}, ttl)
+
+    # Batched variants: cache hits are served from memory and all misses go
+    # upstream in a single provider call, then land in the per-symbol cache.
+    def history_many(self, symbols, period="1y", interval="1d", ttl=None):
+        symbols = [s.upper() for s in symbols]
+        if ttl is None: ttl = INTRADAY_TTL if interval[-1] in "mh" else DAILY_TTL
+        if self.store: loader = lambda missing: self._stored_history(missing, period, interval)
+        else: loader = lambda missing: self._upstream("history_many", missing, lambda: self.provider.history_many(missing, period=period, interval=interval))
+        return self._load_many(symbols, lambda s: ("history", s, period, interval), loader, ttl)
+
+    def info_many(self, symbols, ttl=INFO_TTL):
+        symbols = [s.upper() for s in symbols]
+        infos = self._load_many(symbols, lambda s: ("info", s), lambda missing: self._upstream("info_many", missing, lambda: self.provider.info_many(missing)), ttl)
+        return {s: info if info is not None else {} for s, info in infos.items()}
+
+    # Async variants for the request handlers: same cache and store, but the
+    # upstream wait happens on the event loop (providers with ahistory_many)
+    # or on a worker thread, never on the handler's own thread.
+    async def ahistory(self, symbol, period="1y", interval="1d", ttl=None):
+        hist = (await self.ahistory_many([symbol], period, interval, ttl)).get(symbol.upper())
+        return hist if hist is not None else pd.DataFrame()
+
+    async def ahistory_many(self, symbols, period="1y", interval="1d", ttl=None):
+        symbols = [s.upper() for s in symbols]
+        if ttl is None: ttl = INTRADAY_TTL if interval[-1] in "mh" else DAILY_TTL
+        if self.store: loader = lambda missing: self._astored_history(missing, period, interval)
+        else: loader = lambda missing: self._aupstream("history_many", missing, lambda: self._provider_history_many(missing, period, interval))
+        hists = await self._aload_many(symbols, lambda s: ("history", s, period, interval), loader, ttl)
+        return {s: h if h is not None else pd.DataFrame(columns=BAR_FIELDS) for s, h in hists.items()}
+
+    async def ainfo(self, symbol, ttl=INFO_TTL):
+        return (await self.ainfo_many([symbol], ttl)).get(symbol.upper()) or {}
+
+    async def ainfo_many(self, symbols, ttl=INFO_TTL):
+        symbols = [s.upper() for s in symbols]
+        info_many = getattr(self.provider, "ainfo_many", None) or (lambda missing: asyncio.to_thread(self.provider.info_many, missing))
+        infos = await self._aload_many(symbols, lambda s: ("info", s), lambda missing: self._aupstream("info_many", missing, lambda: info_many(missing)), ttl)
+        return {s: info if info is not None else {} for s, info in infos.items()}
+
+    async def _provider_history_many(self, symbols, period, interval):
+        if hasattr(self.provider, "ahistory_many"): return await self.provider.ahistory_many(symbols, period=period, interval=interval)
+        return await asyncio.to_thread(self.provider.history_many, symbols, period=period, interval=interval)
+
+    def _upstream(self, kind, symbols, call):
+        # Times one provider call and counts it per symbol; batch results
+        # that come back empty for a symbol count as failures for it.
+        started = time.perf_counter()
+        try:
+            result = call()
+        except Exception:
+            self._count_failure(kind, symbols)
+            raise
+        finally:
+            UPSTREAM_SECONDS.observe(time.perf_counter() - started, kind=kind)
+        return self._count(kind, symbols, result)
+
+    async def _aupstream(self, kind, symbols, call):
+        started = time.perf_counter()
+        try:
+            result = await call()
+        except Exception:
+            self._count_failure(kind, symbols)
+            raise
+        finally:
+            UPSTREAM_SECONDS.observe(time.perf_counter() - started, kind=kind)
+        return self._count(kind, symbols, result)
+
+    def _symbol_label(self, symbol, found=False):
+        # Symbols come from request paths, so only ones that have returned
+        # data get their own metric label; the rest share "other"
+        if found and len(self._labelled) < MAX_SYMBOL_LABELS: self._labelled.add(symbol)
+        return symbol if symbol in self._labelled else "other"
+
+    def _count(self, kind, symbols, result):
+        per_symbol = result if kind.endswith("_many") else {symbols[0]: result}
+        for s in symbols:
+            value = per_symbol.get(s)
+            found = value is not None and len(value) > 0
+            label = self._symbol_label(s, found)
+            UPSTREAM_CALLS.inc(kind=kind, symbol=label)
+            if not found: UPSTREAM_FAILURES.inc(kind=kind, symbol=label)
+        return result
+
+    def _count_failure(self, kind, symbols):
+        for s in symbols:
+            UPSTREAM_CALLS.inc(kind=kind, symbol=self._symbol_label(s))
+            UPSTREAM_FAILURES.inc(kind=kind, symbol=self._symbol_label(s))
+
+    def _store_steps(self, symbols, period, interval):
+        # Symbols the store already covers for `period` only fetch the bars
+        # since their last stored one (one batched call sized to the oldest
+        # gap); the rest are backfilled. Reads come from the memmaps.
+        # Written as a generator that yields (kind, symbols, period) fetches
+        # and receives their results, so the sync and async paths share it.
+        backfill = [s for s in symbols if not self.store.covers(s, interval, period)]
+        update = [s for s in symbols if s not in backfill]
+        failed = set()
+        if backfill:
+            hists = yield "history_many", backfill, period
+            for s in backfill: self.store.write(s, interval, hists.get(s), period)
+            failed.update(s for s in backfill if s not in hists and not self.store.covers(s, interval, period))
+        if update:
+            since = min(self.store.last_timestamp(s, interval) for s in update)
+            hists = yield "append_many", update, increment_period(since)
+            for s in update:
+                if not self.store.append(s, interval, hists.get(s)):
+                    # Upstream re-adjusted older bars (split/dividend): refetch everything we had
+                    stored = self.store.meta(s, interval)["period"]
+                    rebuilt = yield "history_many", [s], stored
+                    self.store.write(s, interval, rebuilt.get(s), stored)
+        # Symbols whose fetch failed outright are left out rather than cached empty
+        return {s: self.store.read(s, interval, period) for s in symbols if s not in failed}
+
+    def _stored_history(self, symbols, period, interval):
+        steps = self._store_steps(symbols, period, interval)
+        try:
+            kind, batch, fetch_period = next(steps)
+            while True:
+                hists = self._upstream(kind, batch, lambda: self.provider.history_many(batch, period=fetch_period, interval=interval))
+                kind, batch, fetch_period = steps.send(hists)
+        except StopIteration as done:
+            return done.value
+
+    async def _astored_history(self, symbols, period, interval):
+        steps = self._store_steps(symbols, period, interval)
+        try:
+            kind, batch, fetch_period = next(steps)
+            while True:
+                hists = await self._aupstream(kind, batch, lambda: self._provider_history_many(batch, fetch_period, interval))
+                kind, batch, fetch_period = steps.send(hists)
+        except StopIteration as done:
+            return done.value
+
+    def preload(self, symbols, period="1y", interval="1d"):
+        # Warm the store and the cache (e.g. at startup) so first requests don't wait on upstream
+        return self.history_many(symbols, period=period, interval=interval)
+
+    def quotes(self, symbols, ttl=QUOTE_TTL):
+        # Last price per symbol from one batched intraday lookup
+        return _last_closes(self.history_many(list(dict.fromkeys(symbols)), period="1d", ttl=ttl))
+
+    async def aquotes(self, symbols, ttl=QUOTE_TTL):
+        return _last_closes(await self.ahistory_many(list(dict.fromkeys(symbols)), period="1d", ttl=ttl))
+
+    def _load_many(self, symbols, key, loader, ttl):
+        result = {s: self.cache.get(key(s)) for s in symbols}
+        missing = [s for s, v in result.items() if v is None]
+        if missing:
+            for s, value in loader(missing).items():
+                self.cache.put(key(s), value, ttl)
+                result[s] = value
+        return result
+
+    async def _aload_many(self, symbols, key, loader, ttl):
+        # As _load_many, except that symbols another request is already
+        # fetching wait for that fetch instead of going upstream again
+        result = {s: self.cache.get(key(s)) for s in symbols}
+        waiting = {s: self._pending[key(s)] for s, v in result.items() if v is None and key(s) in self._pending}
+        missing = [s for s, v in result.items() if v is None and s not in waiting]
+        if missing:
+            loop = asyncio.get_running_loop()
+            futures = {s: self._pending.setdefault(key(s), loop.create_future()) for s in missing}
+            try:
+                loaded = await loader(missing)
+            except BaseException as e:
+                for s, future in futures.items():
+                    self._pending.pop(key(s), None)
+                    future.set_exception(e)
+                    future.exception() # waiters re-raise it; don't warn when there are none
+                raise
+            for s, future in futures.items():
+                value = loaded.get(s)
+                if value is not None:
+                    self.cache.put(key(s), value, ttl)
+                    result[s] = value
+                self._pending.pop(key(s), None)
+                future.set_result(value)
+        for s, future in waiting.items():
+            value = await future
+            if value is not None: result[s] = value
+        return result
+
+def _last_closes(hists):
+    return {s: float(h['Close'].iloc[-1]) for s, h in hists.items() if h is not None and not h.empty}
+
+market_data = MarketData()
@@ -0,0 +1,130 @@
+import bisect
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+def _escape(value):
+    # Label value escaping per the Prometheus text format
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _labels(names, values):
+    if not names: return ""
+    return "{" + ",".join(f'{n}="{_escape(v)}"' for n, v in zip(names, values)) + "}"
+
+def _fmt(value):
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name, help, labels=()):
+        self.name, self.help, self.label_names = name, help, tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def _key(self, labels):
+        return tuple(labels.get(n, "") for n in self.label_names)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock: items = sorted(self._values.items())
+        for key, value in items: lines.extend(self._render_one(key, value))
+        return lines
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock: self._values[key] = self._values.get(key, 0) + amount
+
+    def _render_one(self, key, value):
+        return [f"{self.name}{_labels(self.label_names, key)} {_fmt(value)}"]
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set(self, value, **labels):
+        with self._lock: self._values[self._key(labels)] = value
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help, labels=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None: state = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            i = bisect.bisect_left(self.buckets, value)
+            if i < len(self.buckets): state[0][i] += 1
+            state[1] += value
+            state[2] += 1
+
+    def _render_one(self, key, state):
+        counts, total, n = state
+        lines, cumulative = [], 0
+        for bound, count in zip(self.buckets, counts):
+            cumulative += count
+            lines.append(f"{self.name}_bucket{_labels(self.label_names + ('le',), key + (_fmt(bound),))} {cumulative}")
+        lines.append(f"{self.name}_bucket{_labels(self.label_names + ('le',), key + ('+Inf',))} {n}")
+        lines.append(f"{self.name}_sum{_labels(self.label_names, key)} {repr(total)}")
+        lines.append(f"{self.name}_count{_labels(self.label_names, key)} {n}")
+        return lines
+
+REGISTRY = []
+
+REQUEST_SECONDS = Histogram("trademind_request_seconds", "HTTP request latency by endpoint", ("endpoint", "method", "status"))
+STAGE_SECONDS = Histogram("trademind_stage_seconds", "Time spent per processing stage", ("endpoint", "stage"))
+UPSTREAM_SECONDS = Histogram("trademind_upstream_seconds", "Upstream market data call latency", ("kind",))
+UPSTREAM_CALLS = Counter("trademind_upstream_calls_total", "Upstream market data calls", ("kind", "symbol"))
+UPSTREAM_FAILURES = Counter("trademind_upstream_failures_total", "Failed upstream market data calls", ("kind", "symbol"))
+UPSTREAM_RETRIES = Counter("trademind_upstream_retries_total", "Upstream HTTP requests retried after a timeout, 429 or 5xx", ("host",))
+UPSTREAM_THROTTLE_SECONDS = Histogram("trademind_upstream_throttle_seconds", "Time spent waiting on the per-host upstream rate limit")
+ERRORS = Counter("trademind_errors_total", "Errors swallowed or converted to HTTP errors", ("where",))
+TRADER_TICK_SECONDS = Histogram("trademind_trader_tick_seconds", "Auto-trader scheduler tick duration")
+TRADER_TICK_LAG = Gauge("trademind_trader_tick_lag_seconds", "How late the last trader tick started")
+TRADER_SYMBOLS = Gauge("trademind_trader_active_symbols", "Symbols evaluated in the last trader tick")
+STREAM_CLIENTS = Gauge("trademind_stream_clients", "Connected /api/stream clients")
+
+def render():
+    lines = []
+    for metric in REGISTRY: lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+# --- PER-REQUEST STAGE TIMING ---
+# Inside a request, stages are collected on the request's timing list and
+# flushed by the middleware once the route (endpoint label) is known.
+# Outside a request (background refreshers, trader ticks) they are recorded
+# straight away under endpoint="background".
+_request_stages = contextvars.ContextVar("trademind_request_stages", default=None)
+
+def begin_request():
+    stages = []
+    return stages, _request_stages.set(stages)
+
+def end_request(token):
+    _request_stages.reset(token)
+
+@contextmanager
+def stage(name):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        stages = _request_stages.get()
+        if stages is None: STAGE_SECONDS.observe(elapsed, endpoint="background", stage=name)
+        else: stages.append((name, elapsed))
+
+def server_timing(stages, total):
+    parts = [f"{name};dur={elapsed * 1000:.2f}" for name, elapsed in stages]
+    parts.append(f"total;dur={total * 1000:.2f}")
+    return ", ".join(parts)
@@ -0,0 +1,38 @@
+import numpy as np
+
+NOISE = 0.05
+DEFAULT_EXPIRIES = [7, 14, 30, 60, 90]
+
+def _rng(rng):
+    # None -> NumPy's global generator (unseeded, as before); an int seeds a new one
+    if rng is None: return np.random
+    if isinstance(rng, (int, np.integer)): return np.random.default_rng(rng)
+    return rng
+
+def price_options(stock_prices, strikes, expiry_days, volatility, types="CALL", rng=None):
+    # Prices every contract in one NumPy evaluation. All inputs broadcast
+    # against each other; `types` holds "CALL"/"PUT" strings or booleans
+    # (True = CALL).
+    types = np.asarray(types)
+    is_call = types if types.dtype == bool else types == "CALL"
+    stock_prices, strikes, expiry_days, volatility, is_call = np.broadcast_arrays(
+        np.asarray(stock_prices, dtype=float), np.asarray(strikes, dtype=float),
+        np.asarray(expiry_days, dtype=float), np.asarray(volatility, dtype=float), is_call)
+    intrinsic = np.where(is_call, np.maximum(0, stock_prices - strikes), np.maximum(0, strikes - stock_prices))
+    time_val = (stock_prices * volatility * np.sqrt(expiry_days / 365)) * 0.4
+    noise = _rng(rng).uniform(-NOISE, NOISE, size=stock_prices.shape)
+    return np.round(intrinsic + time_val + noise, 2)
+
+def calculate_option_price(stock_price, strike, expiry_days, volatility, type="CALL", rng=None):
+    return float(price_options(stock_price, strike, expiry_days, volatility, type, rng))
+
+def chain_strikes(spot, num_strikes=21, width=0.2):
+    # Whole-dollar strikes spread evenly over spot * (1 +/- width)
+    return np.unique(np.round(spot * np.linspace(1 - width, 1 + width, num_strikes), 0))
+
+def option_chain(spot, strikes, expiries, volatility, rng=None):
+    # (expiries x strikes) call and put grids, priced in a single evaluation
+    strikes = np.asarray(strikes, dtype=float)
+    expiries = np.asarray(expiries, dtype=float)
+    prices = price_options(spot, strikes[None, None, :], expiries[None, :, None], volatility, np.array([True, False])[:, None, None], rng)
+    return prices[0], prices[1]
@@ -0,0 +1,110 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+
+DEFAULT_BALANCE = 15000.0
+
+class PortfolioStore:
+    # Open positions indexed by symbol, with every balance/position change
+    # made under one lock: the SQLite (WAL) journal row is written first and
+    # memory is only updated once it commits, so a failed insert leaves both
+    # untouched. The journal is replayed on startup, and closed trades are
+    # paged straight out of it rather than kept in memory.
+    def __init__(self, path=None, initial_balance=DEFAULT_BALANCE):
+        self.path = path or os.environ.get("TRADEMIND_DB", "trademind.db")
+        self._lock = threading.RLock()
+        self._db = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        if self.path != ":memory:": self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute("""CREATE TABLE IF NOT EXISTS journal (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            ts REAL NOT NULL,
+            kind TEXT NOT NULL,
+            symbol TEXT,
+            balance REAL NOT NULL,
+            payload TEXT NOT NULL)""")
+        self._db.execute("CREATE INDEX IF NOT EXISTS journal_kind ON journal (kind, id)")
+        self.balance = initial_balance
+        self._positions = {}
+        self._realized = {}
+        self._epoch = 0 # journal id of the last reset; history starts after it
+        self._replay()
+
+    def _replay(self):
+        for row_id, kind, symbol, balance, payload in self._db.execute("SELECT id, kind, symbol, balance, payload FROM journal ORDER BY id"):
+            self.balance = balance
+            if kind == "reset":
+                self._positions.clear()
+                self._realized.clear()
+                self._epoch = row_id
+            elif kind == "open":
+                self._positions[symbol] = json.loads(payload)
+            elif kind == "close":
+                self._positions.pop(symbol, None)
+                self._realized[symbol] = self._realized.get(symbol, 0.0) + json.loads(payload)['profit']
+
+    def _append(self, kind, symbol, balance, payload):
+        # `balance` is the balance after this change
+        cur = self._db.execute("INSERT INTO journal (ts, kind, symbol, balance, payload) VALUES (?, ?, ?, ?, ?)",
+                               (time.time(), kind, symbol, balance, json.dumps(payload, default=float)))
+        return cur.lastrowid
+
+    # --- reads ---
+    def position(self, symbol):
+        return self._positions.get(symbol)
+
+    def positions(self):
+        with self._lock: return list(self._positions.values())
+
+    def realized_pnl(self):
+        with self._lock: return dict(self._realized)
+
+    def history_count(self):
+        with self._lock: return self._db.execute("SELECT COUNT(*) FROM journal WHERE kind = 'close' AND id > ?", (self._epoch,)).fetchone()[0]
+
+    def history(self, offset=0, limit=20):
+        # Newest `limit` closed trades after skipping the `offset` newest, oldest first
+        with self._lock:
+            rows = self._db.execute("SELECT payload FROM journal WHERE kind = 'close' AND id > ? ORDER BY id DESC LIMIT ? OFFSET ?",
+                                    (self._epoch, limit, offset)).fetchall()
+        return [json.loads(payload) for (payload,) in reversed(rows)]
+
+    # --- writes ---
+    def open_position(self, position):
+        # Debits the cost and records the position only if the balance covers it
+        with self._lock:
+            symbol = position['symbol']
+            if symbol in self._positions or self.balance < position['cost']: return False
+            self._append("open", symbol, self.balance - position['cost'], position)
+            self.balance -= position['cost']
+            self._positions[symbol] = position
+            return True
+
+    def close_position(self, symbol, exit_price, reason, exit_time):
+        with self._lock:
+            position = self._positions.get(symbol)
+            if position is None: return None
+            revenue = exit_price * position['quantity'] * 100
+            profit = revenue - position['cost']
+            closed = {
+                **position,
+                "exit_price": exit_price,
+                "exit_time": exit_time,
+                "profit": round(profit, 2),
+                "reason": reason,
+                "status": "CLOSED"
+            }
+            self._append("close", symbol, self.balance + revenue, closed)
+            self.balance += revenue
+            del self._positions[symbol]
+            self._realized[symbol] = self._realized.get(symbol, 0.0) + round(profit, 2)
+            return closed
+
+    def reset(self, amount):
+        with self._lock:
+            self._epoch = self._append("reset", None, amount, {"amount": amount})
+            self.balance = amount
+            self._positions.clear()
+            self._realized.clear()
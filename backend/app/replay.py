@@ -0,0 +1,90 @@
+import time
+import numpy as np
+import pandas as pd
+from . import strategy
+from .indicators import indicator_panel
+from .options import _rng, price_options
+from .portfolio import PortfolioStore
+
+def session_indicators(closes, index):
+    # RSI and MACD diff after every bar, as the live trader sees them: one
+    # panel kernel pass per session day, so state starts over each morning
+    rsi, macd_diff = np.full(closes.shape, np.nan), np.full(closes.shape, np.nan)
+    days = index.normalize()
+    for day in days.unique():
+        cols = np.flatnonzero(days == day)
+        panel = indicator_panel(closes[:, cols])
+        rsi[:, cols], macd_diff[:, cols] = panel["rsi"], panel["macd_diff"]
+    return rsi, macd_diff
+
+def replay(histories, store=None, rng=None, initial_balance=None):
+    # Runs the auto-trader rules over intraday bars on a simulated clock, one
+    # tick per bar, as fast as the CPU allows. Per tick every symbol is
+    # evaluated at once; option prices are drawn in symbol order, as the
+    # live loop draws them, so a seeded rng reproduces the live fills. Fills
+    # go through a PortfolioStore (a fresh in-memory one by default).
+    started = time.perf_counter()
+    rng = _rng(rng)
+    if store is None: store = PortfolioStore(":memory:") if initial_balance is None else PortfolioStore(":memory:", initial_balance)
+    histories = {s.upper(): h for s, h in histories.items() if h is not None and not h.empty}
+    symbols = list(histories)
+    index = pd.DatetimeIndex(sorted(set().union(*(h.index for h in histories.values())))) if symbols else pd.DatetimeIndex([])
+    closes = np.full((len(symbols), len(index)), np.nan)
+    for i, s in enumerate(symbols): closes[i, index.get_indexer(histories[s].index)] = histories[s]['Close'].to_numpy(dtype=float)
+    rsi, macd_diff = session_indicators(closes, index)
+
+    # Open positions as arrays; pos_type "" means flat
+    pos_type = np.full(len(symbols), "", dtype="<U4")
+    pos_strike = np.full(len(symbols), np.nan)
+    pos_entry = np.full(len(symbols), np.nan)
+    for i, s in enumerate(symbols):
+        p = store.position(s)
+        if p: pos_type[i], pos_strike[i], pos_entry[i] = p['type'], p['strike'], p['entry_price']
+
+    fills = []
+    for t, now in enumerate(index):
+        price = closes[:, t]
+        held = pos_type != ""
+        entries = np.where(~np.isnan(price) & ~held, strategy.entry_type(rsi[:, t], macd_diff[:, t]), "")
+        idx = np.flatnonzero(~np.isnan(price) & (held | (entries != "")))
+        if not len(idx): continue
+        types = np.where(held[idx], pos_type[idx], entries[idx])
+        strikes = np.where(held[idx], pos_strike[idx], strategy.entry_strike(price[idx], types))
+        opt = price_options(price[idx], strikes, strategy.OPTION_DAYS, strategy.OPTION_VOLATILITY, types, rng)
+        with np.errstate(invalid="ignore"):
+            pnl_percent = (opt - pos_entry[idx]) / pos_entry[idx] * 100
+        reasons = np.where(held[idx], strategy.exit_reason(types, pnl_percent, rsi[idx, t], macd_diff[idx, t]), "")
+
+        stamp = str(now)
+        for k in np.flatnonzero(~held[idx] | (reasons != "")):
+            i, symbol = idx[k], symbols[idx[k]]
+            if held[i]:
+                closed = store.close_position(symbol, float(opt[k]), str(reasons[k]), stamp)
+                if closed:
+                    pos_type[i], pos_strike[i], pos_entry[i] = "", np.nan, np.nan
+                    fills.append({**closed, "side": "CLOSE"})
+            else:
+                entry_price = float(opt[k])
+                position = {"symbol": symbol, "type": str(types[k]), "strike": float(strikes[k]), "entry_price": entry_price,
+                            "quantity": strategy.CONTRACTS, "cost": entry_price * strategy.CONTRACTS * 100, "entry_time": stamp, "status": "OPEN"}
+                if store.open_position(position):
+                    pos_type[i], pos_strike[i], pos_entry[i] = position['type'], position['strike'], entry_price
+                    fills.append({**position, "side": "OPEN"})
+
+    realized = store.realized_pnl()
+    closed = [f for f in fills if f["side"] == "CLOSE"]
+    return {
+        "symbols": len(symbols),
+        "ticks": len(index),
+        "start": str(index[0]) if len(index) else None,
+        "end": str(index[-1]) if len(index) else None,
+        "opened": len(fills) - len(closed),
+        "closed": len(closed),
+        "wins": sum(f["profit"] > 0 for f in closed),
+        "realized_pnl": round(sum(realized.values()), 2),
+        "pnl_by_symbol": realized,
+        "balance": round(store.balance, 2),
+        "open_positions": store.positions(),
+        "elapsed_ms": round((time.perf_counter() - started) * 1000, 1),
+        "fills": fills,
+    }
@@ -0,0 +1,204 @@
+import itertools
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import get_context, shared_memory
+import numpy as np
+from .backtest import INITIAL_BALANCE, WARMUP_BARS, simulate, strategy_inputs
+from .stream import Broadcaster
+
+TRAIN_BARS = 120
+TEST_BARS = 30
+MAX_JOBS = 20 # finished jobs kept for GET /api/backtest/jobs/{id}
+MAX_SYMBOLS = 500     # symbols per job
+MAX_COMBINATIONS = 1000 # parameter sets per job, each re-run on every walk-forward window
+WORKERS = int(os.environ.get("TRADEMIND_BACKTEST_WORKERS", 0)) or os.cpu_count() or 1
+
+def walk_forward_windows(n_bars, train_bars=TRAIN_BARS, test_bars=TEST_BARS, start=WARMUP_BARS):
+    # (train_start, test_start, test_end) per window; the windows roll
+    # forward by one test period so out-of-sample periods never overlap
+    windows = []
+    while start + train_bars + test_bars <= n_bars:
+        windows.append((start, start + train_bars, start + train_bars + test_bars))
+        start += test_bars
+    return windows
+
+# --- WORKER SIDE ---
+# Prices live in one shared (symbols x bars) block; each task only carries
+# its row number and the parameter grid, never the series itself.
+_attached = {}
+
+def _shared_prices(name, shape):
+    shm = _attached.get(name)
+    if shm is None:
+        for old in _attached.values(): old.close() # previous job's block
+        _attached.clear()
+        shm = _attached[name] = shared_memory.SharedMemory(name=name)
+    return np.ndarray(shape, dtype=np.float64, buffer=shm.buf)
+
+def run_symbol(shm_name, shape, row, n_bars, params, train_bars, test_bars):
+    # Every window: pick the best combo on the training bars, then score
+    # every combo on the following test bars. Indicators are computed once
+    # over the full series (they are causal).
+    close = _shared_prices(shm_name, shape)[row, shape[1] - n_bars:].copy()
+    rsi, macd_diff = strategy_inputs(close)
+    windows = []
+    for train_start, test_start, test_end in walk_forward_windows(n_bars, train_bars, test_bars):
+        train = simulate(close[:test_start], rsi[:test_start], macd_diff[:test_start], params, start=train_start)
+        test = simulate(close[:test_end], rsi[:test_end], macd_diff[:test_end], params, start=test_start)
+        windows.append({
+            "test_start": test_start,
+            "best": int(np.argmax(train["return_percent"])),
+            "return_percent": test["return_percent"],
+            "total_trades": test["total_trades"],
+            "wins": test["wins"],
+            "max_drawdown": test["max_drawdown"],
+        })
+    return row, windows
+
+# --- JOBS ---
+_pool = None
+_pool_lock = threading.Lock()
+
+def _executor():
+    # spawn, not fork: the API process runs scheduler/refresher threads
+    global _pool
+    with _pool_lock:
+        if _pool is None: _pool = ProcessPoolExecutor(max_workers=WORKERS, mp_context=get_context("spawn"))
+        return _pool
+
+def _combo(params, k):
+    return {name: float(values[k]) for name, values in params.items()}
+
+class BacktestJob:
+    # One walk-forward run over a universe and a parameter grid. Per-symbol
+    # results are published on `events` ("result") as workers finish, with
+    # the running aggregates as a retained "summary" event.
+    def __init__(self, closes, params, train_bars=TRAIN_BARS, test_bars=TEST_BARS):
+        self.id = uuid.uuid4().hex[:12]
+        self.closes = closes # {symbol: np.ndarray}
+        self.params = params
+        self.train_bars = train_bars
+        self.test_bars = test_bars
+        self.status = "queued"
+        self.error = None
+        self.created_at = time.time()
+        self.finished_at = None
+        self.symbols = {}
+        self.events = Broadcaster()
+        self._lock = threading.Lock()
+        n_combos = len(params["rsi_buy"])
+        self._windows = 0
+        self._return_sum = np.zeros(n_combos)
+        self._trades = np.zeros(n_combos)
+        self._wins = np.zeros(n_combos)
+        self._drawdown = np.zeros(n_combos)
+
+    def start(self):
+        threading.Thread(target=self._run, daemon=True).start()
+        return self
+
+    def _run(self):
+        names = list(self.closes)
+        max_len = max((len(c) for c in self.closes.values()), default=0)
+        shm = None
+        try:
+            self.status = "running"
+            if not names or max_len == 0: raise ValueError("No price history for the requested symbols")
+            # Right-aligned rows, so row[-n:] is each symbol's own history
+            shm = shared_memory.SharedMemory(create=True, size=len(names) * max_len * 8)
+            prices = np.ndarray((len(names), max_len), dtype=np.float64, buffer=shm.buf)
+            prices[:] = np.nan
+            for row, symbol in enumerate(names):
+                closes = self.closes[symbol]
+                prices[row, max_len - len(closes):] = closes
+            pool = _executor()
+            futures = [pool.submit(run_symbol, shm.name, prices.shape, row, len(self.closes[symbol]), self.params, self.train_bars, self.test_bars)
+                       for row, symbol in enumerate(names)]
+            for future in as_completed(futures):
+                row, windows = future.result()
+                self._add(names[row], windows)
+            self.status = "done"
+        except Exception as e:
+            self.status = "failed"
+            self.error = str(e)
+        finally:
+            if shm is not None:
+                shm.close()
+                shm.unlink()
+            self.finished_at = time.time()
+            self.events.publish(self.status, self.summary(), retain=True)
+            self.events.close()
+
+    def _add(self, symbol, windows):
+        # Out-of-sample stats for the symbol use the combo picked in-sample
+        # for each window; the per-combo accumulators cover every combo
+        returns, trades, wins, drawdown, chosen = [], 0, 0, 0.0, []
+        for w in windows:
+            k = w["best"]
+            returns.append(w["return_percent"][k])
+            trades += int(w["total_trades"][k])
+            wins += int(w["wins"][k])
+            drawdown = max(drawdown, float(w["max_drawdown"][k]))
+            chosen.append({"test_start": w["test_start"], **_combo(self.params, k)})
+        growth = np.prod(1 + np.array(returns) / 100) if returns else 1.0
+        result = {
+            "symbol": symbol,
+            "windows": len(windows),
+            "return_percent": round(float((growth - 1) * 100), 2),
+            "total_trades": trades,
+            "win_rate": round(wins * 100.0 / trades, 1) if trades else 0.0,
+            "max_drawdown": round(drawdown, 2),
+            "chosen_params": chosen,
+        }
+        with self._lock:
+            self.symbols[symbol] = result
+            for w in windows:
+                self._windows += 1
+                self._return_sum += w["return_percent"]
+                self._trades += w["total_trades"]
+                self._wins += w["wins"]
+                np.maximum(self._drawdown, w["max_drawdown"], out=self._drawdown)
+        self.events.publish("result", result)
+        self.events.publish("summary", self.summary(), retain=True)
+
+    def param_stats(self, top=None):
+        with self._lock:
+            if not self._windows: return []
+            avg_return = self._return_sum / self._windows
+            win_rate = np.divide(self._wins * 100, self._trades, out=np.zeros_like(self._wins), where=self._trades > 0)
+            rows = [{**_combo(self.params, k),
+                     "avg_return_percent": round(float(avg_return[k]), 2),
+                     "total_trades": int(self._trades[k]),
+                     "win_rate": round(float(win_rate[k]), 1),
+                     "max_drawdown": round(float(self._drawdown[k]), 2)} for k in range(len(avg_return))]
+        rows.sort(key=lambda x: x["avg_return_percent"], reverse=True)
+        return rows[:top] if top else rows
+
+    def summary(self, top=10, include_symbols=False):
+        data = {
+            "job_id": self.id,
+            "status": self.status,
+            "error": self.error,
+            "symbols_total": len(self.closes),
+            "symbols_done": len(self.symbols),
+            "combinations": len(self.params["rsi_buy"]),
+            "train_bars": self.train_bars,
+            "test_bars": self.test_bars,
+            "initial_balance": INITIAL_BALANCE,
+            "elapsed_seconds": round((self.finished_at or time.time()) - self.created_at, 3),
+            "top_params": self.param_stats(top),
+        }
+        if include_symbols: data["symbols"] = list(self.symbols.values())
+        return data
+
+jobs = {}
+
+def submit(closes, params, train_bars=TRAIN_BARS, test_bars=TEST_BARS):
+    job = BacktestJob(closes, params, train_bars, test_bars)
+    jobs[job.id] = job
+    for old in itertools.islice(list(jobs), max(0, len(jobs) - MAX_JOBS)):
+        if jobs[old].status in ("done", "failed"): del jobs[old]
+    return job.start()
@@ -0,0 +1,75 @@
+import threading
+import time
+from .metrics import TRADER_SYMBOLS, TRADER_TICK_LAG, TRADER_TICK_SECONDS
+
+class TraderScheduler:
+    # One worker thread ticks every active trader together. `tick(symbols)`
+    # handles the whole batch and returns how long to wait before the next
+    # tick; wake() cuts the wait short so start/stop apply right away.
+    def __init__(self, tick, active_symbols):
+        self.tick = tick
+        self.active_symbols = active_symbols
+        self._wake = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+        self.ticks = 0
+        self.last_tick_ms = 0.0
+        self.max_tick_ms = 0.0
+        self.total_tick_ms = 0.0
+        self.last_lag_ms = 0.0
+        self.last_tick_at = None
+        self.last_symbols = 0
+
+    def start(self):
+        with self._lock:
+            if self._thread and self._thread.is_alive(): return
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+
+    def wake(self):
+        self._wake.set()
+
+    def _run(self):
+        due = None
+        while True:
+            symbols = self.active_symbols()
+            if not symbols:
+                due = None
+                self._wake.wait()
+                self._wake.clear()
+                continue
+
+            started = time.monotonic()
+            # Lag: how late this tick started relative to when it was due
+            self.last_lag_ms = max(0.0, (started - due) * 1000) if due else 0.0
+            try:
+                delay = self.tick(symbols)
+            except Exception as e:
+                print(f"Trader tick failed: {e}")
+                delay = 10
+            elapsed = (time.monotonic() - started) * 1000
+            self.ticks += 1
+            self.last_tick_ms = elapsed
+            self.max_tick_ms = max(self.max_tick_ms, elapsed)
+            self.total_tick_ms += elapsed
+            self.last_tick_at = time.time()
+            self.last_symbols = len(symbols)
+            TRADER_TICK_SECONDS.observe(elapsed / 1000)
+            TRADER_TICK_LAG.set(self.last_lag_ms / 1000)
+            TRADER_SYMBOLS.set(len(symbols))
+
+            due = time.monotonic() + delay
+            if self._wake.wait(delay): due = None
+            self._wake.clear()
+
+    def stats(self):
+        return {
+            "running": bool(self._thread and self._thread.is_alive()),
+            "ticks": self.ticks,
+            "symbols": self.last_symbols,
+            "last_tick_ms": round(self.last_tick_ms, 2),
+            "avg_tick_ms": round(self.total_tick_ms / self.ticks, 2) if self.ticks else 0.0,
+            "max_tick_ms": round(self.max_tick_ms, 2),
+            "last_lag_ms": round(self.last_lag_ms, 2),
+            "last_tick_at": self.last_tick_at,
+        }
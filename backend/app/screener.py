@@ -0,0 +1,188 @@
+import threading
+import time
+import numpy as np
+import pandas as pd
+from .indicators import indicator_panel, last_valid
+from .market_data import market_data
+from .metrics import stage
+
+MIN_BARS = 50
+
+def score_signals(rsi, macd_diff, bb_percent):
+    score = (2 * (rsi < 30) + ((rsi > 50) & (rsi < 70)) + 2 * (macd_diff > 0) + 3 * (bb_percent < 0.05)
+             - 2 * (rsi > 70) - ((rsi < 50) & (rsi > 30)) - 2 * (macd_diff < 0) - 3 * (bb_percent > 0.95))
+    signal = np.select([score >= 3, score >= 1, score <= -3, score <= -1], ["Strong Buy", "Buy", "Strong Sell", "Sell"], "Neutral")
+    return score.astype(int), signal
+
+def fundamentals(symbols, infos):
+    return pd.DataFrame({
+        "price": [infos[s].get('currentPrice') for s in symbols],
+        "market_cap": pd.Series([infos[s].get('marketCap') for s in symbols], index=symbols, dtype=object),
+        "volume": pd.Series([infos[s].get('volume') for s in symbols], index=symbols, dtype=object),
+        "sector": [infos[s].get('sector') for s in symbols],
+    }, index=symbols)
+
+def latest_indicators(histories, min_bars=MIN_BARS):
+    # Stacks every symbol's closes into one (symbols x time) panel, one row
+    # per history, and evaluates the indicators for all of them together.
+    closes = {s: h['Close'].to_numpy(dtype=float) for s, h in histories.items() if h is not None and len(h) >= min_bars}
+    if not closes: return pd.DataFrame(columns=["rsi", "macd_diff", "bb_percent"])
+    close = np.full((len(closes), max(len(c) for c in closes.values())), np.nan)
+    for i, c in enumerate(closes.values()): close[i, :len(c)] = c
+    panel = indicator_panel(close)
+    return pd.DataFrame({
+        "rsi": last_valid(panel["rsi"], close),
+        "macd_diff": last_valid(panel["macd_diff"], close),
+        "bb_percent": last_valid(panel["bb_pband"], close),
+    }, index=list(closes))
+
+def screen(
+    symbols,
+    min_price=None, max_price=None,
+    min_market_cap=None, max_market_cap=None,
+    min_volume=None, max_volume=None,
+    min_rsi=None, max_rsi=None,
+    macd_signal=None, # "bullish", "bearish", "any"
+    sector=None
+):
+    symbols = [s.upper() for s in symbols]
+    df = fundamentals(symbols, market_data.info_many(symbols))
+
+    # Fundamentals filters first, so history is only fetched for survivors
+    df = df[df['price'].notna() & df['market_cap'].notna() & df['volume'].notna()]
+    if min_price is not None: df = df[df['price'] >= min_price]
+    if max_price is not None: df = df[df['price'] <= max_price]
+    if min_market_cap is not None: df = df[df['market_cap'] >= min_market_cap]
+    if max_market_cap is not None: df = df[df['market_cap'] <= max_market_cap]
+    if min_volume is not None: df = df[df['volume'] >= min_volume]
+    if max_volume is not None: df = df[df['volume'] <= max_volume]
+    if sector is not None: df = df[df['sector'] == sector]
+    if df.empty: return []
+
+    df = df.join(latest_indicators(market_data.history_many(list(df.index), period="6mo")), how="inner")
+    if min_rsi is not None: df = df[df['rsi'] >= min_rsi]
+    if max_rsi is not None: df = df[df['rsi'] <= max_rsi]
+    if macd_signal == "bullish": df = df[df['macd_diff'] > 0]
+    if macd_signal == "bearish": df = df[df['macd_diff'] < 0]
+    if df.empty: return []
+
+    score, signal = score_signals(df['rsi'].to_numpy(), df['macd_diff'].to_numpy(), df['bb_percent'].to_numpy())
+    df = df.assign(score=score, signal=signal).sort_values("score", ascending=False, kind="stable")
+    return [{
+        "symbol": symbol,
+        "price": round(row.price, 2),
+        "signal": row.signal,
+        "score": int(row.score),
+        "rsi": round(row.rsi, 2),
+        "macd": round(row.macd_diff, 2),
+        "market_cap": row.market_cap,
+        "volume": row.volume,
+        "sector": row.sector
+    } for symbol, row in zip(df.index, df.itertuples(index=False))]
+
+# --- SNAPSHOT ---
+class ScreenerSnapshot:
+    # Columnar copy of the screener table for the whole universe: one NumPy
+    # array per field and sector as a categorical code, so a query is a
+    # boolean mask and a sort with no upstream calls.
+    def __init__(self, symbols, price, market_cap, volume, sector, rsi, macd_diff, bb_percent, built_at=None):
+        self.symbols = np.asarray(symbols, dtype=object)
+        self.price = np.asarray(price, dtype=float)
+        self.market_cap = np.asarray(market_cap, dtype=float)
+        self.volume = np.asarray(volume, dtype=float)
+        self.sector_names, self.sector_codes = np.unique(np.asarray(sector, dtype=str), return_inverse=True)
+        self.rsi = np.asarray(rsi, dtype=float)
+        self.macd_diff = np.asarray(macd_diff, dtype=float)
+        self.bb_percent = np.asarray(bb_percent, dtype=float)
+        self.score, self.signal = score_signals(self.rsi, self.macd_diff, self.bb_percent)
+        self._sector_raw = list(sector)
+        self.built_at = built_at or time.time()
+
+    @classmethod
+    def build(cls, symbols):
+        symbols = [s.upper() for s in symbols]
+        with stage("snapshot_fetch"):
+            df = fundamentals(symbols, market_data.info_many(symbols))
+            df = df[df['price'].notna() & df['market_cap'].notna() & df['volume'].notna()]
+            histories = market_data.history_many(list(df.index), period="6mo")
+        with stage("snapshot_indicators"): df = df.join(latest_indicators(histories), how="inner")
+        return cls(df.index, df['price'], df['market_cap'], df['volume'], df['sector'], df['rsi'], df['macd_diff'], df['bb_percent'])
+
+    @property
+    def age(self):
+        return time.time() - self.built_at
+
+    def query(
+        self,
+        min_price=None, max_price=None,
+        min_market_cap=None, max_market_cap=None,
+        min_volume=None, max_volume=None,
+        min_rsi=None, max_rsi=None,
+        macd_signal=None,
+        sector=None
+    ):
+        mask = np.ones(len(self.symbols), dtype=bool)
+        for column, low, high in ((self.price, min_price, max_price), (self.market_cap, min_market_cap, max_market_cap),
+                                  (self.volume, min_volume, max_volume), (self.rsi, min_rsi, max_rsi)):
+            if low is not None: mask &= column >= low
+            if high is not None: mask &= column <= high
+        if macd_signal == "bullish": mask &= self.macd_diff > 0
+        if macd_signal == "bearish": mask &= self.macd_diff < 0
+        if sector is not None:
+            code = np.searchsorted(self.sector_names, sector)
+            if code == len(self.sector_names) or self.sector_names[code] != sector: return []
+            mask &= self.sector_codes == code
+
+        rows = np.flatnonzero(mask)
+        rows = rows[np.argsort(-self.score[rows], kind="stable")]
+        return [{
+            "symbol": self.symbols[i],
+            "price": round(float(self.price[i]), 2),
+            "signal": str(self.signal[i]),
+            "score": int(self.score[i]),
+            "rsi": round(float(self.rsi[i]), 2),
+            "macd": round(float(self.macd_diff[i]), 2),
+            "market_cap": int(self.market_cap[i]),
+            "volume": int(self.volume[i]),
+            "sector": self._sector_raw[i]
+        } for i in rows]
+
+class SnapshotRefresher:
+    # Rebuilds the snapshot in a daemon thread every `interval` seconds.
+    # Readers always get the last complete snapshot; only the very first
+    # read waits for a build.
+    def __init__(self, symbols, interval=300):
+        self.symbols = symbols
+        self.interval = interval
+        self.snapshot = None
+        self.last_error = None
+        self._ready = threading.Event()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def refresh(self):
+        with self._lock:
+            try:
+                self.snapshot = ScreenerSnapshot.build(self.symbols)
+                self.last_error = None
+            except Exception as e:
+                self.last_error = str(e)
+            finally:
+                self._ready.set()
+        return self.snapshot
+
+    def start(self):
+        if self._thread and self._thread.is_alive(): return
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            self.refresh()
+            time.sleep(self.interval)
+
+    def get(self):
+        if self.snapshot is None:
+            if self._thread is None: return self.refresh()
+            self._ready.wait()
+        return self.snapshot
@@ -0,0 +1,50 @@
+import hashlib
+import numpy as np
+import pandas as pd
+
+COLUMNAR_MEDIA_TYPE = "application/vnd.trademind.columnar+json"
+BAR_FIELDS = ['Open', 'High', 'Low', 'Close', 'Volume']
+
+def wants_columnar(request, format=None):
+    # ?format=columnar, or an Accept header naming the columnar media type
+    if format is not None: return format == "columnar"
+    return COLUMNAR_MEDIA_TYPE in request.headers.get("accept", "")
+
+def epoch_ms(index):
+    return index.as_unit("ms").asi8.tolist()
+
+def _floats(values, float32=False):
+    values = np.asarray(values, dtype=float)
+    if not float32: return values.tolist()
+    # float32's shortest repr ("187.3", not "187.300003") is what shrinks the payload
+    return [float(v) for v in values.astype(np.float32).astype(str)]
+
+def bar_columns(hist, fields=BAR_FIELDS, float32=False):
+    # One array per field instead of one dict per bar
+    columns = {"t": epoch_ms(hist.index)}
+    for field in fields:
+        values = hist[field].to_numpy()
+        columns[field.lower()] = values.astype(np.int64).tolist() if field == 'Volume' else _floats(values, float32)
+    return columns
+
+def record_columns(records, keys, date_key="date"):
+    # Lists of dicts (predictions, trades) as one array per key, with the
+    # "YYYY-MM-DD" date strings turned into epoch-ms "t"
+    columns = {"t": epoch_ms(pd.DatetimeIndex(pd.to_datetime([r[date_key] for r in records])))}
+    columns.update({key: [r.get(key) for r in records] for key in keys})
+    return columns
+
+def make_etag(*parts):
+    return 'W/"' + hashlib.blake2b(repr(parts).encode(), digest_size=12).hexdigest() + '"'
+
+def bars_etag(symbol, hist, *parts):
+    # Keyed on the last bar: its timestamp plus close/volume, since today's
+    # daily bar keeps its timestamp while it is still trading
+    last = hist.iloc[-1]
+    return make_etag(symbol.upper(), hist.index[-1].value, float(last['Close']), float(last.get('Volume', 0)), len(hist), *parts)
+
+def not_modified(request, etag):
+    header = request.headers.get("if-none-match")
+    if not header: return False
+    tags = [t.strip() for t in header.split(",")]
+    return "*" in tags or etag in tags or etag.removeprefix("W/") in tags
@@ -0,0 +1,27 @@
+import numpy as np
+
+# Auto-trader rules, shared by the live loop (main.trade_symbol) and the
+# replay engine. Each rule takes scalars or equally shaped arrays.
+RSI_OVERSOLD = 30
+RSI_OVERBOUGHT = 70
+TAKE_PROFIT_PCT = 20
+STOP_LOSS_PCT = -10
+OPTION_DAYS = 7
+OPTION_VOLATILITY = 0.4
+CONTRACTS = 10
+
+def entry_type(rsi, macd_diff):
+    # "CALL" on oversold + rising momentum, "PUT" on overbought + falling, else ""
+    return np.select([(rsi < RSI_OVERSOLD) & (macd_diff > 0), (rsi > RSI_OVERBOUGHT) & (macd_diff < 0)], ["CALL", "PUT"], "")
+
+def entry_strike(price, contract_type):
+    return np.where(contract_type == "CALL", np.round(price * 1.02, 0), np.round(price * 0.98, 0))
+
+def exit_reason(contract_type, pnl_percent, rsi, macd_diff):
+    # First matching reason in priority order, else ""
+    return np.select([
+        pnl_percent >= TAKE_PROFIT_PCT,
+        pnl_percent <= STOP_LOSS_PCT,
+        (contract_type == "CALL") & ((rsi > RSI_OVERBOUGHT) | (macd_diff < 0)),
+        (contract_type == "PUT") & ((rsi < RSI_OVERSOLD) | (macd_diff > 0)),
+    ], ["TAKE PROFIT", "STOP LOSS", "REVERSAL", "REVERSAL"], "")
@@ -0,0 +1,123 @@
+import asyncio
+import itertools
+import json
+import threading
+from .metrics import ERRORS
+
+HEARTBEAT_SECONDS = 15
+QUEUE_SIZE = 100
+
+def _offer(queue, message):
+    # Runs on the subscriber's loop. A client that can't keep up loses its
+    # oldest messages rather than growing the queue without bound.
+    if queue.full(): queue.get_nowait()
+    queue.put_nowait(message)
+
+class Broadcaster:
+    # Server-sent event fan-out. publish() may be called from any thread;
+    # each event is encoded once and the same bytes are queued for every
+    # connected client, so N viewers cost one computation. Retained events
+    # (state snapshots, not one-off fills) are replayed to new clients so
+    # they start from the current state without waiting for the next push.
+    def __init__(self, queue_size=QUEUE_SIZE, heartbeat=HEARTBEAT_SECONDS, clients_gauge=None):
+        self.queue_size = queue_size
+        self.heartbeat = heartbeat
+        self.clients_gauge = clients_gauge
+        self.on_subscribe = None
+        self._subscribers = set()
+        self._retained = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self.closed = False
+
+    @property
+    def subscribers(self):
+        return len(self._subscribers)
+
+    def publish(self, event, data, retain=False):
+        payload = json.dumps(data, default=str)
+        with self._lock:
+            message = f"id: {next(self._ids)}\nevent: {event}\ndata: {payload}\n\n".encode()
+            if retain: self._retained[event] = message
+            subscribers = list(self._subscribers)
+        self._send(subscribers, message)
+
+    def close(self):
+        # Ends every open stream once it has drained; later subscribers get
+        # the retained events and then the end of the stream
+        with self._lock:
+            self.closed = True
+            subscribers = list(self._subscribers)
+        self._send(subscribers, None)
+
+    def _send(self, subscribers, message):
+        for entry in subscribers:
+            loop, queue = entry
+            try:
+                loop.call_soon_threadsafe(_offer, queue, message)
+            except RuntimeError: # loop already closed
+                with self._lock: self._subscribers.discard(entry)
+
+    async def subscribe(self):
+        entry = (asyncio.get_running_loop(), asyncio.Queue(self.queue_size))
+        with self._lock:
+            self._subscribers.add(entry)
+            backlog = list(self._retained.values())
+            closed = self.closed
+        self._count_clients()
+        if self.on_subscribe: self.on_subscribe()
+        try:
+            for message in backlog: yield message
+            while not closed:
+                try:
+                    message = await asyncio.wait_for(entry[1].get(), self.heartbeat)
+                except asyncio.TimeoutError:
+                    message = b": keep-alive\n\n"
+                if message is None: break
+                yield message
+        finally:
+            with self._lock: self._subscribers.discard(entry)
+            self._count_clients()
+
+    def _count_clients(self):
+        if self.clients_gauge: self.clients_gauge.set(self.subscribers)
+
+class PeriodicPublisher:
+    # Rebuilds one retained event every `interval` seconds, or right away on
+    # wake(), but only while someone is listening and only when the payload
+    # actually changed since the last push.
+    def __init__(self, broadcaster, event, build, interval):
+        self.broadcaster = broadcaster
+        self.event = event
+        self.build = build
+        self.interval = interval
+        self._wake = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+        self._last = None
+
+    def start(self):
+        with self._lock:
+            if self._thread and self._thread.is_alive(): return
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+
+    def wake(self):
+        self._wake.set()
+
+    def publish(self):
+        if not self.broadcaster.subscribers: return
+        data = self.build()
+        if data == self._last: return
+        self._last = data
+        self.broadcaster.publish(self.event, data, retain=True)
+
+    def _run(self):
+        while True:
+            try:
+                self.publish()
+            except Exception as e:
+                print(f"Publishing {self.event} failed: {e}")
+                ERRORS.inc(where=f"stream_{self.event}")
+            self._wake.wait(self.interval)
+            self._wake.clear()
@@ -0,0 +1,102 @@
+import zlib
+import numpy as np
+import pandas as pd
+
+SECTORS = ["Technology", "Healthcare", "Financial Services", "Consumer Cyclical", "Energy", "Industrials", "Communication Services"]
+PERIOD_BARS = {"1d": 1, "5d": 5, "1mo": 21, "3mo": 63, "6mo": 126, "1y": 252, "2y": 504, "5y": 1260, "10y": 2520}
+SESSION_BARS = {"1m": 390, "2m": 195, "5m": 78, "15m": 26, "30m": 13, "60m": 7, "1h": 7}
+END_DATE = "2024-12-31"
+TZ = "America/New_York"
+
+def random_walk_ohlcv(rng, n_bars, start_price, drift=0.0003, vol=0.02):
+    # Geometric random walk closes with consistent open/high/low around them
+    close = start_price * np.exp(np.cumsum(rng.normal(drift, vol, n_bars)))
+    open_ = np.concatenate(([start_price], close[:-1])) * np.exp(rng.normal(0, vol / 4, n_bars))
+    spread = np.abs(rng.normal(0, vol / 2, n_bars))
+    high = np.maximum(open_, close) * (1 + spread)
+    low = np.minimum(open_, close) * (1 - spread)
+    volume = rng.lognormal(15, 0.5, n_bars).astype(np.int64)
+    return {"Open": open_, "High": high, "Low": low, "Close": close, "Volume": volume}
+
+class SyntheticMarket:
+    # Deterministic stand-in for yfinance: seeded daily and intraday OHLCV
+    # plus fake .info fundamentals. Any symbol can be requested (its series
+    # is seeded from the name); `symbols` is the universe to iterate over.
+    # Implements the market data provider interface, and ticker() returns a
+    # yf.Ticker-like object with .history() and .info.
+    def __init__(self, symbols=100, bars=252, seed=0, period_slicing=True):
+        if isinstance(symbols, int): symbols = [f"SYN{i:04d}" for i in range(symbols)]
+        self.symbols = [s.upper() for s in symbols]
+        self.bars = bars
+        self.seed = seed
+        self.period_slicing = period_slicing
+        self._daily, self._intraday, self._info = {}, {}, {}
+        self._daily_index = pd.bdate_range(end=END_DATE, periods=bars, tz=TZ, name="Date")
+
+    def _symbol_rng(self, symbol, stream):
+        return np.random.default_rng([self.seed, stream, zlib.crc32(symbol.encode())])
+
+    def _start_price(self, symbol):
+        return float(self._symbol_rng(symbol, 0).uniform(10, 500))
+
+    def daily(self, symbol):
+        if symbol not in self._daily:
+            rng = self._symbol_rng(symbol, 1)
+            self._daily[symbol] = pd.DataFrame(random_walk_ohlcv(rng, self.bars, self._start_price(symbol)), index=self._daily_index)
+        return self._daily[symbol]
+
+    def intraday(self, symbol, interval="5m"):
+        key = (symbol, interval)
+        if key not in self._intraday:
+            n_bars = SESSION_BARS.get(interval, 78)
+            minutes = 390 // n_bars
+            session_open = self._daily_index[-1] + pd.Timedelta(hours=9, minutes=30)
+            index = pd.date_range(session_open, periods=n_bars, freq=f"{minutes}min", name="Datetime")
+            rng = self._symbol_rng(symbol, 2 + n_bars)
+            prev_close = self.daily(symbol)['Close'].iloc[-2] if self.bars > 1 else self._start_price(symbol)
+            self._intraday[key] = pd.DataFrame(random_walk_ohlcv(rng, n_bars, prev_close, drift=0, vol=0.002), index=index)
+        return self._intraday[key]
+
+    # --- provider interface ---
+    def history(self, symbol, period="1y", interval="1d"):
+        symbol = symbol.upper()
+        if interval[-1] in "mh": return self.intraday(symbol, interval)
+        hist = self.daily(symbol)
+        if not self.period_slicing or period == "max": return hist
+        return hist.iloc[-PERIOD_BARS.get(period, self.bars):]
+
+    def info(self, symbol):
+        symbol = symbol.upper()
+        if symbol not in self._info:
+            rng = self._symbol_rng(symbol, 99)
+            last = self.daily(symbol)
+            self._info[symbol] = {
+                "symbol": symbol,
+                "longName": f"{symbol} Synthetic Corp.",
+                "currentPrice": round(float(last['Close'].iloc[-1]), 2),
+                "marketCap": int(rng.lognormal(24, 1.5)),
+                "volume": int(last['Volume'].iloc[-1]),
+                "trailingPE": round(float(rng.uniform(5, 80)), 2),
+                "sector": SECTORS[int(rng.integers(len(SECTORS)))],
+            }
+        return self._info[symbol]
+
+    def history_many(self, symbols, period="1y", interval="1d"):
+        return {s: self.history(s, period=period, interval=interval) for s in symbols}
+
+    def info_many(self, symbols):
+        return {s: self.info(s) for s in symbols}
+
+    def ticker(self, symbol):
+        return SyntheticTicker(self, symbol)
+
+class SyntheticTicker:
+    def __init__(self, market, symbol):
+        self.market, self.ticker = market, symbol.upper()
+
+    def history(self, period="1mo", interval="1d", **kwargs):
+        return self.market.history(self.ticker, period=period, interval=interval)
+
+    @property
+    def info(self):
+        return self.market.info(self.ticker)
@@ -0,0 +1,97 @@
+import asyncio
+import os
+import random
+import time
+from urllib.parse import urlsplit
+import httpx
+from .metrics import UPSTREAM_RETRIES, UPSTREAM_THROTTLE_SECONDS
+
+UPSTREAM_CONCURRENCY = int(os.environ.get("TRADEMIND_UPSTREAM_CONCURRENCY", 16)) # in-flight requests, all hosts
+UPSTREAM_RATE = float(os.environ.get("TRADEMIND_UPSTREAM_RATE", 20))             # requests/second per host
+UPSTREAM_BURST = int(os.environ.get("TRADEMIND_UPSTREAM_BURST", 10))
+UPSTREAM_TIMEOUT = float(os.environ.get("TRADEMIND_UPSTREAM_TIMEOUT", 10))       # seconds per attempt
+MAX_RETRIES = int(os.environ.get("TRADEMIND_UPSTREAM_RETRIES", 3))
+RETRY_BACKOFF = 0.25 # seconds; doubles per attempt, full jitter
+RETRY_STATUS = {429, 500, 502, 503, 504}
+USER_AGENT = "Mozilla/5.0 (compatible; TradeMind)"
+
+class RateLimiter:
+    # Token bucket: `rate` requests per second with bursts of up to `burst`.
+    # Waiters reserve their slot before sleeping, so they leave in order.
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+
+    def reserve(self):
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+        self._tokens -= 1
+        return 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+
+    async def acquire(self):
+        wait = self.reserve()
+        if wait > 0:
+            UPSTREAM_THROTTLE_SECONDS.observe(wait)
+            await asyncio.sleep(wait)
+
+class Upstream:
+    # Shared async HTTP access to market data hosts: one pooled keep-alive
+    # client, a cap on in-flight requests across all hosts, a token bucket
+    # per host, a timeout per attempt and exponential backoff with full
+    # jitter on timeouts, connection errors, 429 and 5xx. The client and
+    # semaphore belong to an event loop and are rebuilt if the loop changes.
+    def __init__(self, concurrency=UPSTREAM_CONCURRENCY, rate=UPSTREAM_RATE, burst=UPSTREAM_BURST,
+                 timeout=UPSTREAM_TIMEOUT, retries=MAX_RETRIES, backoff=RETRY_BACKOFF):
+        self.concurrency = concurrency
+        self.rate = rate
+        self.burst = burst
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self._limiters = {}
+        self._loop = None
+        self._client = None
+        self._slots = None
+
+    def _bind(self):
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            self._loop = loop
+            self._client = httpx.AsyncClient(
+                timeout=self.timeout, headers={"User-Agent": USER_AGENT},
+                limits=httpx.Limits(max_connections=self.concurrency, max_keepalive_connections=self.concurrency))
+            self._slots = asyncio.Semaphore(self.concurrency)
+        return self._client
+
+    def limiter(self, host):
+        if host not in self._limiters: self._limiters[host] = RateLimiter(self.rate, self.burst)
+        return self._limiters[host]
+
+    async def get_json(self, url, params=None):
+        client = self._bind()
+        limiter = self.limiter(urlsplit(url).netloc)
+        for attempt in range(self.retries + 1):
+            try:
+                async with self._slots:
+                    await limiter.acquire()
+                    response = await client.get(url, params=params)
+                if response.status_code not in RETRY_STATUS or attempt == self.retries:
+                    response.raise_for_status()
+                    return response.json()
+                retry_after = response.headers.get("retry-after")
+            except (httpx.TimeoutException, httpx.TransportError):
+                if attempt == self.retries: raise
+                retry_after = None
+            UPSTREAM_RETRIES.inc(host=urlsplit(url).netloc)
+            delay = random.uniform(0, self.backoff * 2 ** attempt)
+            if retry_after and retry_after.isdigit(): delay = max(delay, float(retry_after))
+            await asyncio.sleep(delay)
+
+    async def aclose(self):
+        if self._client is not None: await self._client.aclose()
+        self._client = self._loop = None
+
+upstream = Upstream()
@@ -0,0 +1,102 @@
+"""Parity check of the indicator kernel against ta and StreamingIndicators.
+
+app/indicators.indicator_panel must match ta run on each symbol's own
+closes (within --tolerance, relative to max(1, |value|)), and its RSI/MACD
+must agree bit for bit with StreamingIndicators fed the same bars. Rows are
+mangled into the shapes the app produces: right-padded short histories,
+interior NaN gaps and rows shorter than the indicator windows. Exits
+non-zero on any mismatch; bench.run runs it as the "indicators.parity" stage.
+ta is a dev-only dependency (requirements-dev.txt).
+
+    cd backend
+    python -m bench.parity --symbols 100 --bars 1260
+"""
+import argparse
+import sys
+import numpy as np
+import pandas as pd
+
+from app.indicators import StreamingIndicators, indicator_panel
+from app.synthetic import SyntheticMarket
+
+TOLERANCE = 1e-9
+EXACT = ["rsi", "macd", "macd_signal", "macd_diff"] # StreamingIndicators' recursions
+
+def ta_indicators(close):
+    try:
+        from ta.momentum import RSIIndicator
+        from ta.trend import MACD, EMAIndicator, SMAIndicator
+        from ta.volatility import BollingerBands
+    except ImportError:
+        raise RuntimeError("the parity check needs ta: pip install -r requirements-dev.txt")
+    close = pd.Series(close)
+    macd, bb = MACD(close), BollingerBands(close)
+    return {
+        "sma_20": SMAIndicator(close, window=20).sma_indicator(), "sma_50": SMAIndicator(close, window=50).sma_indicator(),
+        "ema_20": EMAIndicator(close, window=20).ema_indicator(), "rsi": RSIIndicator(close, window=14).rsi(),
+        "macd": macd.macd(), "macd_signal": macd.macd_signal(), "macd_diff": macd.macd_diff(),
+        "bb_mavg": bb.bollinger_mavg(), "bb_hband": bb.bollinger_hband(), "bb_lband": bb.bollinger_lband(), "bb_pband": bb.bollinger_pband(),
+    }
+
+def streaming_indicators(close):
+    ind, out = StreamingIndicators(), {name: [] for name in EXACT}
+    for x in close:
+        ind.update(float(x))
+        for name in EXACT: out[name].append(getattr(ind, name))
+    return {name: np.array(values) for name, values in out.items()}
+
+def mangled_panel(closes, seed=0):
+    # One row per close series, cycling through padded, gapped and short rows
+    rng = np.random.default_rng(seed)
+    panel = np.full((len(closes), max(map(len, closes))), np.nan)
+    for i, close in enumerate(closes):
+        kind = i % 3
+        if kind == 0: close = close[:rng.integers(len(close) // 2, len(close) + 1)]
+        if kind == 2: close = close[-rng.integers(1, 60):]
+        panel[i, :len(close)] = close
+        if kind == 1 and len(close) > 40:
+            holes = rng.choice(np.arange(1, len(close)), size=min(10, len(close) // 20), replace=False)
+            panel[i, holes] = np.nan
+    return panel
+
+def check(panel, rows=None, tolerance=TOLERANCE):
+    # Mismatches as (row, indicator, detail); an empty list means parity
+    out = indicator_panel(panel)
+    failures = []
+    for i in (range(len(panel)) if rows is None else rows):
+        valid = ~np.isnan(panel[i])
+        if not valid.any(): continue
+        close = panel[i, valid]
+        for name, expected in ta_indicators(close).items():
+            got, expected = out[name][i, valid], expected.to_numpy(dtype=float)
+            if not np.array_equal(np.isnan(got), np.isnan(expected)):
+                failures.append((i, name, "NaN positions differ from ta"))
+                continue
+            error = np.nanmax(np.abs(got - expected) / np.maximum(1, np.abs(expected)), initial=0.0)
+            if error > tolerance: failures.append((i, name, f"max relative error {error:.3g} vs ta"))
+        for name, expected in streaming_indicators(close).items():
+            if not np.array_equal(out[name][i, valid], expected, equal_nan=True):
+                failures.append((i, name, "not bit-identical to StreamingIndicators"))
+    return failures
+
+def assert_parity(closes, max_rows=30, seed=0):
+    panel = mangled_panel(closes, seed)
+    failures = check(panel, rows=range(0, len(panel), max(1, len(panel) // max_rows)))
+    if failures: raise AssertionError("indicator kernel parity failed: " + "; ".join(f"row {i} {name}: {detail}" for i, name, detail in failures[:10]))
+
+def main_cli(argv=None):
+    parser = argparse.ArgumentParser(description="Check the indicator kernel against ta and StreamingIndicators")
+    parser.add_argument("--symbols", type=int, default=60)
+    parser.add_argument("--bars", type=int, default=1260)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE)
+    args = parser.parse_args(argv)
+    market = SyntheticMarket(args.symbols, bars=args.bars, seed=args.seed, period_slicing=False)
+    closes = [market.history(s, period="max")['Close'].to_numpy(dtype=float) for s in market.symbols]
+    failures = check(mangled_panel(closes, args.seed), tolerance=args.tolerance)
+    for i, name, detail in failures: print(f"MISMATCH row {i} {name}: {detail}")
+    print(f"{len(closes)} rows checked, {len(failures)} mismatches")
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main_cli())
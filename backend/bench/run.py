@@ -0,0 +1,174 @@
+"""Offline benchmark suite for the TradeMind backend.
+
+Runs every endpoint and inner stage against a seeded SyntheticMarket (no
+network) for several universe sizes and history lengths, writes the timings
+as JSON, and exits non-zero when a stage is slower than a baseline run by
+more than --max-regression. The "indicators.parity" stage raises when the
+indicator kernel drifts from ta or StreamingIndicators (see bench.parity;
+needs requirements-dev.txt).
+
+    cd backend
+    python -m bench.run --output bench_results.json
+    python -m bench.run --baseline bench_results.json --max-regression 0.25
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+
+os.environ.setdefault("TRADEMIND_DB", ":memory:") # keep benchmark fills out of the real journal
+
+import numpy as np
+import pandas as pd
+from fastapi import Request, Response
+
+from app import main
+from app import forecast
+from app.backtest import param_grid, sweep
+from app.indicators import indicator_panel
+from app.market_data import market_data
+from app.replay import replay
+from app.screener import ScreenerSnapshot, latest_indicators
+from app.synthetic import SyntheticMarket
+from bench.parity import assert_parity
+
+# --- STAGES ---
+# Each stage is (name, setup, run); setup(ctx) runs untimed before each repetition.
+def _no_setup(ctx): pass
+
+def _request():
+    return Request({"type": "http", "method": "GET", "path": "/", "headers": [], "query_string": b""})
+
+_loop = asyncio.new_event_loop()
+def _await(coro): return _loop.run_until_complete(coro) # async endpoints, one loop for the whole run
+
+def _clear_forecasts(ctx): forecast._coef_cache.invalidate()
+
+def _open_book(ctx):
+    main.portfolio.reset(1e12)
+    for i, symbol in enumerate(ctx['symbols']):
+        main.portfolio.open_position({"symbol": symbol, "type": "CALL" if i % 2 == 0 else "PUT", "strike": 100.0, "entry_price": 5.0,
+                                      "quantity": 10, "cost": 5000.0, "entry_time": "bench", "status": "OPEN"})
+
+def _arm_traders(ctx):
+    main.portfolio.reset(1e12)
+    main.active_traders.clear()
+    for symbol in ctx['symbols']:
+        main.active_traders[symbol] = True
+        main.trader_pnl.setdefault(symbol, 0.0)
+    main.trader_indicators.clear()
+    main.auto_trader_tick(ctx['symbols']) # seed indicator state; the timed tick is the steady-state one
+
+def _snapshot(ctx):
+    ctx['snapshot'] = ScreenerSnapshot.build(ctx['symbols'])
+    main.screener_snapshot.snapshot = ctx['snapshot']
+
+def _close_panel(ctx):
+    closes = [h['Close'].to_numpy() for h in market_data.history_many(ctx['symbols'], period="1y").values()]
+    ctx['panel'] = np.full((len(closes), max(map(len, closes))), np.nan)
+    for i, c in enumerate(closes): ctx['panel'][i, :len(c)] = c
+
+def _closes(ctx):
+    ctx['closes'] = [h['Close'].to_numpy(dtype=float) for h in market_data.history_many(ctx['symbols'], period="max").values()]
+
+def _sweep_grid(ctx):
+    ctx['grid'] = param_grid(np.linspace(20, 45, 10), np.linspace(55, 80, 10), np.linspace(-1, 0, 5), np.linspace(-1, 0, 2))
+
+STAGES = [
+    ("indicators.kernel", _close_panel, lambda ctx: indicator_panel(ctx['panel'])),
+    ("indicators.parity", _closes, lambda ctx: assert_parity(ctx['closes'])),
+    ("indicators.panel", _no_setup, lambda ctx: latest_indicators(market_data.history_many(ctx['symbols'], period="6mo"))),
+    ("screener.snapshot_build", _no_setup, lambda ctx: ScreenerSnapshot.build(ctx['symbols'])),
+    ("screener.query", _snapshot, lambda ctx: ctx['snapshot'].query(min_rsi=30, macd_signal="bullish")),
+    ("endpoint.screener", _snapshot, lambda ctx: _await(main.run_screener(Response(), min_price=20, max_rsi=70))),
+    ("endpoint.analyze_stock", _no_setup, lambda ctx: main.analyze_stock(ctx['symbols'][0])),
+    ("endpoint.stock", _no_setup, lambda ctx: _await(main.get_stock_data(ctx['symbols'][0], _request(), Response()))),
+    ("endpoint.stock_columnar", _no_setup, lambda ctx: _await(main.get_stock_data(ctx['symbols'][0], _request(), Response(), bars=1000, format="columnar"))),
+    ("endpoint.predict", _clear_forecasts, lambda ctx: _await(main.predict_stock(ctx['symbols'][0], _request(), Response()))),
+    ("endpoint.predict_batch", _clear_forecasts, lambda ctx: _await(main.predict_batch(_request(), symbols=ctx['symbols']))),
+    ("endpoint.backtest", _no_setup, lambda ctx: _await(main.backtest_strategy(ctx['symbols'][0], _request(), Response()))),
+    ("backtest.sweep_1000", _sweep_grid, lambda ctx: sweep(market_data.history(ctx['symbols'][0], period="1y")['Close'].to_numpy(), ctx['grid'])),
+    ("endpoint.portfolio", _open_book, lambda ctx: _await(main.get_portfolio())),
+    ("trader.tick", _arm_traders, lambda ctx: main.auto_trader_tick(ctx['symbols'])),
+    ("trader.replay_session", _no_setup, lambda ctx: replay(market_data.history_many(ctx['symbols'], period="1d", interval="5m"), rng=0)),
+]
+
+def run_stage(ctx, setup, fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        market_data.cache.invalidate()
+        setup(ctx)
+        started = time.perf_counter()
+        fn(ctx)
+        timings.append((time.perf_counter() - started) * 1000)
+    return timings
+
+def run(universe_sizes, history_lengths, repeat, stage_filter=None, seed=0):
+    original_provider, original_open = market_data.provider, main.is_market_open
+    main.is_market_open = lambda: True
+    results = []
+    try:
+        for bars in history_lengths:
+            for n_symbols in universe_sizes:
+                market = SyntheticMarket(n_symbols, bars=bars, seed=seed, period_slicing=False)
+                market_data.provider = market
+                ctx = {"symbols": market.symbols}
+                for name, setup, fn in STAGES:
+                    if stage_filter and not any(f in name for f in stage_filter): continue
+                    timings = run_stage(ctx, setup, fn, repeat)
+                    results.append({"stage": name, "symbols": n_symbols, "bars": bars, "median_ms": round(statistics.median(timings), 3),
+                                    "min_ms": round(min(timings), 3), "max_ms": round(max(timings), 3)})
+                    print(f"{name:<26} symbols={n_symbols:<5} bars={bars:<5} median={results[-1]['median_ms']:>10.3f} ms")
+    finally:
+        market_data.provider, main.is_market_open = original_provider, original_open
+        market_data.cache.invalidate()
+        main.active_traders.clear()
+    return results
+
+def regressions(results, baseline, max_regression, min_delta_ms):
+    # Stages whose median grew by more than max_regression (relative) and
+    # min_delta_ms (absolute, so sub-millisecond jitter can't fail the run)
+    base = {(r['stage'], r['symbols'], r['bars']): r for r in baseline['results']}
+    failed = []
+    for r in results:
+        b = base.get((r['stage'], r['symbols'], r['bars']))
+        if b and r['median_ms'] > b['median_ms'] * (1 + max_regression) and r['median_ms'] - b['median_ms'] > min_delta_ms:
+            failed.append({**r, "baseline_ms": b['median_ms'], "ratio": round(r['median_ms'] / b['median_ms'], 2)})
+    return failed
+
+def main_cli(argv=None):
+    parser = argparse.ArgumentParser(description="Offline TradeMind backend benchmarks")
+    parser.add_argument("--symbols", type=int, nargs="+", default=[30, 100, 500], help="universe sizes")
+    parser.add_argument("--bars", type=int, nargs="+", default=[252, 1260], help="daily history lengths")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--stages", nargs="+", help="only run stages whose name contains one of these")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="bench_results.json")
+    parser.add_argument("--baseline", help="previous results JSON to compare against")
+    parser.add_argument("--max-regression", type=float, default=0.25, help="allowed relative slowdown per stage")
+    parser.add_argument("--min-delta-ms", type=float, default=1.0, help="ignore slowdowns smaller than this")
+    args = parser.parse_args(argv)
+
+    results = run(args.symbols, args.bars, args.repeat, args.stages, args.seed)
+    report = {
+        "meta": {"timestamp": time.time(), "python": platform.python_version(), "platform": platform.platform(),
+                 "numpy": np.__version__, "pandas": pd.__version__, "repeat": args.repeat, "seed": args.seed},
+        "results": results,
+    }
+    with open(args.output, "w") as f: json.dump(report, f, indent=2)
+    print(f"Saved {len(results)} timings to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f: baseline = json.load(f)
+        failed = regressions(results, baseline, args.max_regression, args.min_delta_ms)
+        for r in failed:
+            print(f"REGRESSION {r['stage']} symbols={r['symbols']} bars={r['bars']}: {r['median_ms']} ms vs {r['baseline_ms']} ms ({r['ratio']}x)")
+        if failed: return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main_cli())
@@ -0,0 +1,114 @@
+"""Local stand-in for Yahoo's chart API, serving SyntheticMarket bars.
+
+Answers GET /v8/finance/chart/<SYMBOL>?range=..&interval=.. in the shape
+chart_frame() parses. --fail-rate answers that share of requests with 503 and
+--rate answers 429 once more than that many requests per second arrive, so
+the retries, backoff and pacing in app/upstream.py can be exercised offline.
+GET /stats reports what the stub has seen.
+
+    cd backend
+    python -m bench.stub_upstream --port 8900 --latency 0.05 --rate 50
+    TRADEMIND_UPSTREAM_URL=http://127.0.0.1:8900 uvicorn app.main:app
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from app.synthetic import SyntheticMarket
+
+def chart_payload(hist, symbol, tz):
+    stamps = (hist.index.as_unit("s").asi8).tolist()
+    quote = {f.lower(): hist[f].tolist() for f in ['Open', 'High', 'Low', 'Close', 'Volume']}
+    return {"chart": {"result": [{
+        "meta": {"symbol": symbol, "exchangeTimezoneName": tz},
+        "timestamp": stamps,
+        "indicators": {"quote": [quote], "adjclose": [{"adjclose": quote["close"]}]},
+    }], "error": None}}
+
+class StubUpstream(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, market, latency=0.0, fail_rate=0.0, rate=None):
+        super().__init__(address, StubHandler)
+        self.market, self.latency, self.fail_rate, self.rate = market, latency, fail_rate, rate
+        self.lock = threading.Lock()
+        self.window = []
+        self.in_flight = 0
+        self.stats = {"requests": 0, "ok": 0, "throttled": 0, "failed": 0, "max_in_flight": 0}
+
+    def admit(self):
+        # 429 above `rate` requests in any trailing one-second window
+        now = time.monotonic()
+        with self.lock:
+            self.stats["requests"] += 1
+            self.window = [t for t in self.window if t > now - 1]
+            if self.rate and len(self.window) >= self.rate:
+                self.stats["throttled"] += 1
+                return 429
+            self.window.append(now)
+            if random.random() < self.fail_rate:
+                self.stats["failed"] += 1
+                return 503
+            self.in_flight += 1
+            self.stats["max_in_flight"] = max(self.stats["max_in_flight"], self.in_flight)
+            return 200
+
+    def release(self):
+        with self.lock:
+            self.in_flight -= 1
+            self.stats["ok"] += 1
+
+class StubHandler(BaseHTTPRequestHandler):
+    def log_message(self, *args): pass
+
+    def _send(self, status, body, headers=()):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in headers: self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        if url.path == "/stats":
+            with self.server.lock: return self._send(200, dict(self.server.stats))
+        if not url.path.startswith("/v8/finance/chart/"): return self._send(404, {"error": "not found"})
+        status = self.server.admit()
+        if status != 200: return self._send(status, {"error": "throttled" if status == 429 else "unavailable"}, [("Retry-After", "1")] if status == 429 else [])
+        try:
+            if self.server.latency: time.sleep(self.server.latency)
+            symbol = url.path.rsplit("/", 1)[-1].upper()
+            query = {k: v[0] for k, v in parse_qs(url.query).items()}
+            hist = self.server.market.history(symbol, period=query.get("range", "1y"), interval=query.get("interval", "1d"))
+            self._send(200, chart_payload(hist, symbol, str(hist.index.tz)))
+        finally:
+            self.server.release()
+
+def serve(port=0, latency=0.0, fail_rate=0.0, rate=None, seed=0, bars=252):
+    # Starts the stub on a daemon thread; returns the server (its URL is
+    # f"http://127.0.0.1:{server.server_port}")
+    server = StubUpstream(("127.0.0.1", port), SyntheticMarket(bars=bars, seed=seed), latency, fail_rate, rate)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def main_cli(argv=None):
+    parser = argparse.ArgumentParser(description="Stub chart API backed by SyntheticMarket")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every successful response")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="share of requests answered with 503")
+    parser.add_argument("--rate", type=float, help="requests per second before answering 429")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--bars", type=int, default=252)
+    args = parser.parse_args(argv)
+    server = StubUpstream(("127.0.0.1", args.port), SyntheticMarket(bars=args.bars, seed=args.seed), args.latency, args.fail_rate, args.rate)
+    print(f"Stub upstream on http://127.0.0.1:{args.port}")
+    server.serve_forever()
+
+if __name__ == "__main__":
+    main_cli()
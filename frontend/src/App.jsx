@@ -159,8 +159,11 @@ function App() {
     if (activeTab === 'screener') runScreener()
     else if (activeTab === 'portfolio') {
         fetchPortfolio()
-        const interval = setInterval(fetchPortfolio, 5000) 
-        return () => clearInterval(interval)
+        // Server pushes portfolio/trader snapshots; no polling needed
+        const stream = new EventSource('http://localhost:8000/api/stream')
+        stream.addEventListener('portfolio', (e) => setPortfolio(JSON.parse(e.data)))
+        stream.addEventListener('trader', (e) => setPortfolio((prev) => prev ? { ...prev, ...JSON.parse(e.data) } : prev))
+        return () => stream.close()
     }
     else if (!data) fetchData()
   }, [activeTab])